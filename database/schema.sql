@@ -31,20 +31,36 @@ CREATE INDEX idx_words_rank ON words(bnc_rank, frq_rank);
 
 -- 2. 语料库句子表 (The Raw Material)
 -- 核心作用：存储原始例句与来源分类，不进行合并，保留原汁原味
+-- 🗂️ 分区：按 source_corpus 分区，每个来源内再把噪音语域 (spam/jokes/twitter/Unclassified)
+--    单独放进 _noise 子分区。查询带上 original_genre NOT IN (...) 即可在规划阶段裁剪掉噪音分区；
+--    重新导入某个语料库时整体替换其分区 (见 scripts/corpus_pipeline.py)，不再大批量 DELETE。
 DROP TABLE IF EXISTS corpus_sentences CASCADE;
 CREATE TABLE corpus_sentences (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,                           -- 分区表无法以 id 单独作主键，改为普通索引
     sentence_text TEXT NOT NULL,         -- 句子原文
     words_array TEXT[] NOT NULL,         -- 分词数组 (用于 GIN 倒排索引)
     
     -- 🌍 来源元数据
-    source_corpus VARCHAR(10),           -- 'BNC' 或 'MASC'
-    original_genre VARCHAR(50),          -- 原始分类 (如 'World Affairs', 'twitter')
+    source_corpus VARCHAR(10) NOT NULL,  -- 'BNC' 或 'MASC' (分区键)
+    original_genre VARCHAR(50),          -- 原始分类 (如 'World Affairs', 'twitter') (子分区键)
     file_id VARCHAR(100),                -- 来源文件名 (用于溯源)
     
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+) PARTITION BY LIST (source_corpus);
+
+CREATE TABLE corpus_sentences_bnc PARTITION OF corpus_sentences
+    FOR VALUES IN ('BNC') PARTITION BY LIST (original_genre);
+CREATE TABLE corpus_sentences_bnc_noise PARTITION OF corpus_sentences_bnc
+    FOR VALUES IN ('spam', 'jokes', 'twitter', 'Unclassified');
+CREATE TABLE corpus_sentences_bnc_main PARTITION OF corpus_sentences_bnc DEFAULT;
+
+CREATE TABLE corpus_sentences_masc PARTITION OF corpus_sentences
+    FOR VALUES IN ('MASC') PARTITION BY LIST (original_genre);
+CREATE TABLE corpus_sentences_masc_noise PARTITION OF corpus_sentences_masc
+    FOR VALUES IN ('spam', 'jokes', 'twitter', 'Unclassified');
+CREATE TABLE corpus_sentences_masc_main PARTITION OF corpus_sentences_masc DEFAULT;
 
--- GIN 索引：支持 array 包含查询 (words_array @> ARRAY['think'])
+-- GIN 索引：支持 array 包含查询 (words_array @> ARRAY['think'])，自动在每个分区上建立
 CREATE INDEX idx_corpus_words ON corpus_sentences USING GIN (words_array);
+CREATE INDEX idx_corpus_id ON corpus_sentences(id);
 CREATE INDEX idx_corpus_source_genre ON corpus_sentences(source_corpus, original_genre);
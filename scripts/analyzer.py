@@ -1,7 +1,9 @@
 import nltk
 import psycopg2
 from collections import Counter, defaultdict
-import re
+from scripts.corpus_pipeline import NOISE_GENRES
+from scripts.pos_tagger import BatchTagger, CACHE_SIZE
+from scripts.lexicon import load_lemma_map
 
 # NLTK 资源
 try:
@@ -17,9 +19,9 @@ DB_CONFIG = {
 }
 
 class NuanceAnalyzer:
-    def __init__(self):
+    def __init__(self, tag_cache_size=None):
         # 1. 黑名单语域 (不专业/噪音大)
-        self.GENRE_BLACKLIST = {'spam', 'jokes', 'twitter', 'Unclassified'}
+        self.GENRE_BLACKLIST = set(NOISE_GENRES)
         
         # 2. 停用词
         self.stopwords = {
@@ -31,19 +33,18 @@ class NuanceAnalyzer:
         # 3. 加载词形表
         self.lemma_map = self._load_lemma_map()
         self.MIN_SENTENCE_THRESHOLD = 5
+        
+        # 4. 批量词性标注 (多进程 + 按句子 id 记忆，跨单词复用)
+        self.tagger = BatchTagger(cache_size=tag_cache_size or CACHE_SIZE)
+
+    def close(self):
+        self.tagger.close()
 
     def _load_lemma_map(self):
         print("🧠 Loading Lemmatization Map...")
-        lemma_db = {}
         try:
             conn = psycopg2.connect(**DB_CONFIG)
-            cur = conn.cursor()
-            cur.execute("SELECT spelling, exchange FROM words WHERE exchange IS NOT NULL AND exchange != ''")
-            for base, exc in cur.fetchall():
-                base = base.lower()
-                variants = re.findall(r':[a-zA-Z\-]+', exc)
-                for v in variants:
-                    lemma_db[v[1:].lower()] = base
+            lemma_db = load_lemma_map(conn.cursor())
             conn.close()
             return lemma_db
         except: return {}
@@ -52,6 +53,24 @@ class NuanceAnalyzer:
         return self.lemma_map.get(word.lower(), word.lower())
 
     def analyze(self, target_word, strategy, sentences_data):
+        return self.render_state(self.collect_state(target_word, strategy, sentences_data), strategy)
+
+    # ==========================================================
+    # 🧮 可合并计数状态 (Mergeable Count State)
+    # 结构: {"register": {"BNC": {genre: n}, ...},
+    #        "genres": {genre: {"patterns": {...}, "examples": {...}}}}       (PATTERN)
+    #        "genres": {genre: {"modifiers": {...}, "objects": {...}, "examples": {...}}}  (LINEAR)
+    # 计数是完整的原始值，两份状态相加即等于对两批句子一起分析的结果。
+    # ==========================================================
+    COUNTER_KEYS = ('patterns', 'modifiers', 'objects')
+    EXAMPLE_LIMIT = {'PATTERN': 3, 'LINEAR': 1}
+    EXAMPLE_KEEP = 30  # 每个计数器只为前 N 项保留例句，控制状态体积
+
+    def collect_state(self, target_word, strategy, sentences_data):
+        """
+        sentences_data: [(text, words_arr, source, genre[, sentence_id])]
+        带 sentence_id 时按 id 记忆词性标注结果，跨单词复用
+        """
         target_lemma = target_word.lower()
         
         # 1. 双源语域雷达 (Dual-Source Radar)
@@ -59,7 +78,10 @@ class NuanceAnalyzer:
         register_stats = {"BNC": Counter(), "MASC": Counter()}
         grouped_sents = defaultdict(list) # 按语域分组例句
         
-        for text, words_arr, source, genre in sentences_data:
+        for row in sentences_data:
+            text, words_arr, source, genre = row[:4]
+            key = row[4] if len(row) > 4 else text
+            
             # A. 噪音清洗
             if genre in self.GENRE_BLACKLIST: continue
             if text.isupper(): continue # 过滤全大写标题 (LEAVING A LEGACY)
@@ -68,84 +90,148 @@ class NuanceAnalyzer:
             # B. 统计分布
             # 确保 source 只有 BNC/MASC，防止脏数据
             src_key = source if source in ['BNC', 'MASC'] else 'Other'
-            register_stats[src_key][genre] += 1
+            register_stats.setdefault(src_key, Counter())[genre] += 1
             
             # C. 收集例句用于深度分析
-            grouped_sents[genre].append((text, words_arr))
+            grouped_sents[genre].append((text, words_arr, key))
 
-        # 2. 策略分流
-        analysis_result = {}
+        # 2. 一次性批量标注所有语域的句子
+        # 标注失败时直接抛出: 不能把缺少构式/搭配的状态当作分析完成写回 (sync 还会越过这些句子)
+        tags = {}
+        if strategy in ('PATTERN', 'LINEAR'):
+            tags = self.tagger.tag([(key, words_arr) for sents in grouped_sents.values()
+                                    for _, words_arr, key in sents])
+
+        # 3. 策略分流 (所有语域都计数，Top 语域在渲染时再选)
+        genres = {}
+        for genre, sents in grouped_sents.items():
+            sents = [(text, tags[key]) for text, _, key in sents if key in tags]
+            if strategy == 'PATTERN':
+                genres[genre] = self._engine_a_pattern(target_lemma, sents)
+            elif strategy == 'LINEAR':
+                genres[genre] = self._engine_b_linear(target_lemma, sents)
+        
+        state = {
+            "register": {k: dict(v) for k, v in register_stats.items()}, # 转为普通dict
+            "genres": genres
+        }
+        self._prune_examples(state)
+        return state
+
+    def merge_state(self, base, delta, strategy):
+        """把新一批句子的状态 delta 累加进 base (均可为数据库中读出的 JSON)"""
+        if not base: return delta
+        limit = self.EXAMPLE_LIMIT.get(strategy, 1)
+        
+        register = {src: dict(stats) for src, stats in base.get('register', {}).items()}
+        for src, stats in delta.get('register', {}).items():
+            merged = Counter(register.get(src, {}))
+            merged.update(stats)
+            register[src] = dict(merged)
+        
+        genres = dict(base.get('genres', {}))
+        for genre, d in delta.get('genres', {}).items():
+            b = genres.get(genre, {})
+            g = {}
+            for key in self.COUNTER_KEYS:
+                if key in b or key in d:
+                    merged = Counter(b.get(key, {}))
+                    merged.update(d.get(key, {}))
+                    g[key] = dict(merged)
+            examples = {k: list(v) for k, v in b.get('examples', {}).items()}
+            for k, exs in d.get('examples', {}).items():
+                cur = examples.setdefault(k, [])
+                cur.extend(exs[:max(0, limit - len(cur))])
+            g['examples'] = examples
+            genres[genre] = g
+        
+        state = {"register": register, "genres": genres}
+        self._prune_examples(state)
+        return state
+
+    def _prune_examples(self, state):
+        for g in state['genres'].values():
+            keep = set()
+            for key in self.COUNTER_KEYS:
+                if key in g:
+                    keep.update(p for p, c in Counter(g[key]).most_common(self.EXAMPLE_KEEP))
+            g['examples'] = {k: v for k, v in g.get('examples', {}).items() if k in keep}
+
+    def render_state(self, state, strategy):
+        """由计数状态渲染出前端使用的 register + analysis JSON (廉价的派生步骤)"""
+        register_stats = state.get('register', {})
         
         # 获取 Top 5 活跃语域 (合并 BNC 和 MASC 的所有语域按总数排序)
         all_genres = Counter()
         for src in register_stats:
             all_genres.update(register_stats[src])
         
-        top_genres = [g for g, c in all_genres.most_common(5)]
-        
-        if strategy == 'PATTERN':
-            analysis_result = self._engine_a_pattern(target_lemma, top_genres, grouped_sents)
-        elif strategy == 'LINEAR':
-            analysis_result = self._engine_b_linear(target_lemma, top_genres, grouped_sents)
+        analysis_result = {}
+        for genre, n in all_genres.most_common(5):
+            if n < self.MIN_SENTENCE_THRESHOLD: continue
+            g = state.get('genres', {}).get(genre)
+            if not g: continue
             
+            if strategy == 'PATTERN':
+                rendered = self._render_patterns(g)
+            elif strategy == 'LINEAR':
+                rendered = self._render_collocations(g)
+            else:
+                rendered = None
+            if rendered:
+                analysis_result[genre] = rendered
+        
         return {
-            "register": {k: dict(v) for k, v in register_stats.items()}, # 转为普通dict
+            "register": {k: dict(v) for k, v in register_stats.items()},
             "analysis": analysis_result
         }
 
     # ==========================================================
     # 🟠 Engine A: 构式解析 (升级版: 词性感知)
     # ==========================================================
-    def _engine_a_pattern(self, target_lemma, genres, grouped_sents):
-        patterns_by_genre = {}
+    def _engine_a_pattern(self, target_lemma, sents):
+        pattern_counter = Counter()
+        examples_map = defaultdict(list)
         
-        for genre in genres:
-            sents = grouped_sents[genre]
-            if len(sents) < self.MIN_SENTENCE_THRESHOLD: continue
-            
-            pattern_counter = Counter()
-            examples_map = defaultdict(list)
-            
-            for text, words_arr in sents:
-                try:
-                    tagged = nltk.pos_tag(words_arr)
-                    
-                    # 寻找目标词，且必须进行词性检查
-                    indices = [i for i, (w, t) in enumerate(tagged) 
-                               if self.normalize_word(w) == target_lemma]
+        for text, tagged in sents:
+            try:
+                
+                # 寻找目标词，且必须进行词性检查
+                indices = [i for i, (w, t) in enumerate(tagged) 
+                           if self.normalize_word(w) == target_lemma]
+                
+                for idx in indices:
+                    target_tag = tagged[idx][1]
                     
-                    for idx in indices:
-                        target_tag = tagged[idx][1]
+                    # 🔥 核心修正: 根据目标词性分流
+                    pat = None
+                    if target_tag.startswith('V'): # 动词
+                        pat = self._extract_verb_pattern(tagged, idx)
+                    elif target_tag.startswith('N'): # 名词
+                        pat = self._extract_noun_pattern(tagged, idx)
+                    elif target_tag.startswith('J'): # 形容词
+                        pat = self._extract_adj_pattern(tagged, idx)
                         
-                        # 🔥 核心修正: 根据目标词性分流
-                        pat = None
-                        if target_tag.startswith('V'): # 动词
-                            pat = self._extract_verb_pattern(tagged, idx)
-                        elif target_tag.startswith('N'): # 名词
-                            pat = self._extract_noun_pattern(tagged, idx)
-                        elif target_tag.startswith('J'): # 形容词
-                            pat = self._extract_adj_pattern(tagged, idx)
-                            
-                        if pat:
-                            pattern_counter[pat] += 1
-                            if len(examples_map[pat]) < 3:
-                                examples_map[pat].append(text)
-                except: continue
-            
-            # 整理结果
-            top_patterns = []
-            for pat, count in pattern_counter.most_common(5):
-                if count < 2: continue
-                top_patterns.append({
-                    "template": pat,
-                    "count": count,
-                    "examples": examples_map[pat]
-                })
-            
-            if top_patterns:
-                patterns_by_genre[genre] = top_patterns
-                
-        return patterns_by_genre
+                    if pat:
+                        pattern_counter[pat] += 1
+                        if len(examples_map[pat]) < 3:
+                            examples_map[pat].append(text)
+            except: continue
+        
+        return {"patterns": dict(pattern_counter), "examples": dict(examples_map)}
+
+    def _render_patterns(self, genre_state):
+        # 整理结果
+        examples_map = genre_state.get('examples', {})
+        top_patterns = []
+        for pat, count in Counter(genre_state.get('patterns', {})).most_common(5):
+            if count < 2: continue
+            top_patterns.append({
+                "template": pat,
+                "count": count,
+                "examples": examples_map.get(pat, [])
+            })
+        return top_patterns
 
     def _extract_verb_pattern(self, tagged, idx):
         if idx + 1 >= len(tagged): return None
@@ -181,55 +267,56 @@ class NuanceAnalyzer:
     # ==========================================================
     # 🔵 Engine B: 线性搭配
     # ==========================================================
-    def _engine_b_linear(self, target_lemma, genres, grouped_sents):
-        collabs_by_genre = {}
+    def _engine_b_linear(self, target_lemma, sents):
+        modifiers = Counter()
+        objects = Counter()
+        examples_map = defaultdict(list)
         
-        for genre in genres:
-            sents = grouped_sents[genre]
-            if len(sents) < self.MIN_SENTENCE_THRESHOLD: continue
-            
-            modifiers = Counter()
-            objects = Counter()
-            examples_map = defaultdict(list)
-            
-            for text, words_arr in sents:
-                try:
-                    tagged = nltk.pos_tag(words_arr)
-                    indices = [i for i, (w, t) in enumerate(tagged) 
-                               if self.normalize_word(w) == target_lemma]
-                    
-                    for idx in indices:
-                        start, end = max(0, idx-3), min(len(tagged), idx+4)
-                        for i in range(start, end):
-                            if i == idx: continue
-                            w, t = tagged[i]
-                            if not w.isalpha() or w in self.stopwords: continue
-                            
-                            phrase = ""
-                            item_type = None
-                            
-                            if i < idx: # 前置修饰
-                                if t.startswith('J') or t.startswith('R') or t.startswith('V'):
-                                    phrase = f"{w} {target_lemma}"
-                                    item_type = 'mod'
-                            else: # 后置搭配
-                                if t.startswith('N') or t.startswith('I'):
-                                    phrase = f"{target_lemma} {w}"
-                                    item_type = 'obj'
-                            
-                            if phrase and item_type:
-                                if item_type == 'mod': modifiers[phrase] += 1
-                                else: objects[phrase] += 1
-                                if len(examples_map[phrase]) < 1:
-                                    examples_map[phrase].append(text)
-                except: continue
+        for text, tagged in sents:
+            try:
+                indices = [i for i, (w, t) in enumerate(tagged) 
+                           if self.normalize_word(w) == target_lemma]
                 
-            res = {}
-            top_mod = [{"p": p, "c": c, "ex": examples_map[p][0]} for p, c in modifiers.most_common(6) if c > 1]
-            top_obj = [{"p": p, "c": c, "ex": examples_map[p][0]} for p, c in objects.most_common(6) if c > 1]
-            
-            if top_mod: res["modifiers"] = top_mod
-            if top_obj: res["objects"] = top_obj
-            if res: collabs_by_genre[genre] = res
-            
-        return collabs_by_genre
+                for idx in indices:
+                    start, end = max(0, idx-3), min(len(tagged), idx+4)
+                    for i in range(start, end):
+                        if i == idx: continue
+                        w, t = tagged[i]
+                        if not w.isalpha() or w in self.stopwords: continue
+                        
+                        phrase = ""
+                        item_type = None
+                        
+                        if i < idx: # 前置修饰
+                            if t.startswith('J') or t.startswith('R') or t.startswith('V'):
+                                phrase = f"{w} {target_lemma}"
+                                item_type = 'mod'
+                        else: # 后置搭配
+                            if t.startswith('N') or t.startswith('I'):
+                                phrase = f"{target_lemma} {w}"
+                                item_type = 'obj'
+                        
+                        if phrase and item_type:
+                            if item_type == 'mod': modifiers[phrase] += 1
+                            else: objects[phrase] += 1
+                            if len(examples_map[phrase]) < 1:
+                                examples_map[phrase].append(text)
+            except: continue
+        
+        return {"modifiers": dict(modifiers), "objects": dict(objects), "examples": dict(examples_map)}
+
+    def _render_collocations(self, genre_state):
+        examples_map = genre_state.get('examples', {})
+        
+        def top(counter):
+            # 例句缺失时 (极少见的并列排名) 跳过该搭配
+            return [{"p": p, "c": c, "ex": examples_map[p][0]}
+                    for p, c in Counter(counter).most_common(6) if c > 1 and examples_map.get(p)]
+        
+        res = {}
+        top_mod = top(genre_state.get('modifiers', {}))
+        top_obj = top(genre_state.get('objects', {}))
+        
+        if top_mod: res["modifiers"] = top_mod
+        if top_obj: res["objects"] = top_obj
+        return res
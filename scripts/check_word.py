@@ -1,33 +1,32 @@
-import psycopg2
 import sys
 from scripts.synonym_service import SynonymEngine
 
-DB_CONFIG = {
-    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432", 
-    "host": "localhost", "options": "-c client_encoding=utf8"
-}
-
 def print_ascii_bar(percent, length=15):
     filled = int(length * percent / 100)
     return '█' * filled + '░' * (length - filled)
 
 def display_word_report(word):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
+    # 数据访问统一走 SynonymEngine (Postgres 或只读快照，见 scripts/snapshot.py)
+    eng = SynonymEngine()
     
     # 1. 基础信息
-    cur.execute("SELECT id, processing_strategy, definition_cn, bnc_rank FROM words WHERE spelling = %s", (word,))
-    row = cur.fetchone()
+    row = eng.get_word(word)
     
     if not row:
+        # 回退链: 词形还原 -> 英美拼写 -> 拼写纠错
+        res = eng.resolve_word(word)
+        if res['match'] and res['match'] != word:
+            print(f"↪️  {word} -> {res['match']} ({res['via']})")
+            return display_word_report(res['match'])
         print(f"❌ 未收录单词: {word}")
+        if res['suggestions']:
+            print(f"   💡 您是不是要找: {', '.join(res['suggestions'])}")
         return
         
     wid, strategy, def_cn, rank = row
     
     # 2. 分析结果
-    cur.execute("SELECT register_stats, analysis_data FROM word_nuance_profiles WHERE word_id = %s", (wid,))
-    res_row = cur.fetchone()
+    res_row = eng.get_profile(wid)
     
     print("\n" + "═"*70)
     print(f"📘 {word.upper()}  |  Rank: #{rank}  |  Type: {strategy}")
@@ -35,7 +34,6 @@ def display_word_report(word):
     print("═"*70)
 
     # 3. 🔗 智能近义词推荐 (置顶显示)
-    eng = SynonymEngine()
     syns = eng.get_synonyms_scored(word)
     
     if syns:
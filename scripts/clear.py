@@ -14,7 +14,7 @@ def clear_profiles():
         # 仅清空分析结果，保留 words 和 corpus_sentences
         cur.execute("TRUNCATE TABLE word_nuance_profiles RESTART IDENTITY CASCADE;")
         conn.commit()
-        print("✅ 已清空。请运行新的 main.py 进行重算。")
+        print("✅ 已清空。请运行 python -m scripts.update_profiles build --all 进行重算。")
         conn.close()
     except Exception as e:
         print(f"❌ 错误: {e}")
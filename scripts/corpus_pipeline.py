@@ -0,0 +1,409 @@
+import os
+import re
+import sys
+import string
+import argparse
+import importlib
+import queue
+import multiprocessing as mp
+from glob import glob
+
+import psycopg2
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+# 流水线参数
+CHUNK_SIZE = 500          # 句子级阶段每个消息携带的记录数 (降低进程间通信开销)
+QUEUE_MAXSIZE = 8         # 有界队列: 下游处理不过来时上游自动阻塞 (背压)
+WRITE_BATCH = 2000        # 与原导入脚本一致的批量写入大小
+DEFAULT_WORKERS = 2       # 每个阶段的工作进程数
+POLL_INTERVAL = 1.0       # 主进程检查子进程存活状态的间隔 (秒)
+
+_SENTINEL = None
+
+# 噪音语域: 每个来源分区内单独成区，查询时通过 NOT IN 被分区裁剪
+# (NuanceAnalyzer.GENRE_BLACKLIST 也引用这里)
+NOISE_GENRES = ('spam', 'jokes', 'twitter', 'Unclassified')
+
+# update_profiles 的句子水位线 (nuance_meta 中的键)
+WATERMARK_KEY = 'profile_sentence_watermark'
+
+# 导入期间持有的 advisory lock (共享模式，多个导入可并行)。
+# 多个写入进程并行提交，新 id 的可见顺序不保证递增；update_profiles 以排他模式尝试加锁，
+# 有导入进行中时拒绝推进水位线
+IMPORT_LOCK_ID = 7243001
+
+# 各语料库格式注册表: 名称 -> Reader 类
+READERS = {}
+
+# 内置 Reader 所在模块 (导入时自动注册)
+BUILTIN_READER_MODULES = ['scripts.import_bnc', 'scripts.import_masc']
+
+
+def register_reader(name):
+    """
+    注册语料库 Reader：
+        @register_reader('bnc')
+        class BNCReader(CorpusReader): ...
+    """
+    def decorator(cls):
+        READERS[name] = cls
+        cls.format_name = name
+        return cls
+    return decorator
+
+
+def load_builtin_readers():
+    for module in BUILTIN_READER_MODULES:
+        importlib.import_module(module)
+
+
+class CorpusReader:
+    """
+    语料库 Reader 基类。
+    默认行为即可处理「纯文本语料」：目录下的 *.txt，父文件夹名作为语域，
+    按句末标点分句，按空白分词。新语料库只需覆盖与自身格式不同的步骤。
+    """
+    source = 'TEXT'           # 写入 source_corpus 的值 (VARCHAR(10))
+    file_pattern = '*.txt'
+    min_tokens = 4            # 与原脚本一致: 少于 4 个片段的句子视为碎片
+
+    _SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+    def __init__(self, root, source=None):
+        self.root = root
+        if source: self.source = source
+
+    # --- Stage 0: 发现文件 ---
+    def discover(self):
+        files = glob(os.path.join(self.root, '**', self.file_pattern), recursive=True)
+        return sorted(f for f in files if not os.path.basename(f).startswith('.'))
+
+    # --- Stage 1: 读取 ---
+    def genre_of(self, filepath):
+        # 父文件夹名作为分类 (例如 .../fiction/abc.txt -> fiction)
+        return os.path.basename(os.path.dirname(filepath)) or 'Unclassified'
+
+    def read(self, filepath):
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+
+    # --- Stage 2: 分句 ---
+    def segment(self, raw):
+        text = re.sub(r'\s+', ' ', raw.replace('\x00', ''))
+        for sent in self._SENT_SPLIT.split(text):
+            if len(sent.split()) >= self.min_tokens:
+                yield sent.strip()
+
+    # --- Stage 3: 分词 ---
+    def tokenize(self, unit):
+        # 去掉词首尾标点 (friend. -> friend)，再保留纯字母数字词
+        tokens = (w.strip(string.punctuation) for w in unit.split())
+        words_arr = [w.lower() for w in tokens if w.isalnum()]
+        return unit, words_arr
+
+    # --- Stage 4: 过滤 ---
+    def keep(self, text, words_arr):
+        return bool(words_arr)
+
+
+@register_reader('text')
+class PlainTextReader(CorpusReader):
+    """纯文本语料：完全使用基类默认行为"""
+
+
+# ==========================================================
+# 阶段函数: 每个函数接收一条记录，返回 0..n 条下游记录
+# ==========================================================
+def _stage_read(reader, filepath):
+    fid = os.path.basename(filepath)
+    return [(reader.read(filepath), reader.genre_of(filepath), fid)]
+
+def _stage_segment(reader, doc):
+    raw, genre, fid = doc
+    return [(unit, genre, fid) for unit in reader.segment(raw)]
+
+def _stage_tokenize(reader, item):
+    unit, genre, fid = item
+    text, words_arr = reader.tokenize(unit)
+    return [(text, words_arr, genre, fid)]
+
+def _stage_filter(reader, item):
+    text, words_arr, genre, fid = item
+    return [item] if reader.keep(text, words_arr) else []
+
+# (名称, 阶段函数, 输出块大小)
+# 读取阶段的输出是整篇文档，读完一篇立即送往下游，由有界队列限制在途文档数
+STAGES = [
+    ('read', _stage_read, 1),
+    ('segment', _stage_segment, CHUNK_SIZE),
+    ('tokenize', _stage_tokenize, CHUNK_SIZE),
+    ('filter', _stage_filter, CHUNK_SIZE),
+]
+
+
+def _transform_worker(name, fn, chunk_size, reader, in_q, out_q):
+    """通用阶段进程：从上游队列取块，逐条处理，按块送往下游"""
+    out = []
+    for chunk in iter(in_q.get, _SENTINEL):
+        for item in chunk:
+            try:
+                out.extend(fn(reader, item))
+            except Exception as e:
+                print(f"\n⚠️ [{name}] 跳过一条记录: {e}")
+            if len(out) >= chunk_size:
+                out_q.put(out)
+                out = []
+    if out:
+        out_q.put(out)
+
+
+def _insert_rows(cur, table, rows):
+    args = ','.join(cur.mogrify("(%s,%s,%s,%s,%s)", x).decode('utf-8') for x in rows)
+    cur.execute(f"INSERT INTO {table} (sentence_text, words_array, source_corpus, original_genre, file_id) VALUES {args}")
+
+
+def _writer_worker(reader, in_q, table, counter, failed):
+    """写入阶段进程：每个进程持有独立的数据库连接；写入失败的句子数累计到 failed"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    buffer = []
+
+    def flush():
+        try:
+            _insert_rows(cur, table, buffer)
+            conn.commit()
+            with counter.get_lock():
+                counter.value += len(buffer)
+                total = counter.value
+            print(f"\r⏳ [{reader.source}] 已存: {total}", end="")
+        except Exception as e:
+            conn.rollback()
+            with failed.get_lock():
+                failed.value += len(buffer)
+            print(f"\n⚠️ 批量写入失败，丢弃 {len(buffer)} 句: {e}")
+
+    for chunk in iter(in_q.get, _SENTINEL):
+        for text, words_arr, genre, fid in chunk:
+            buffer.append((text, words_arr, reader.source, genre, fid))
+        if len(buffer) >= WRITE_BATCH:
+            flush()
+            buffer = []
+    if buffer:
+        flush()
+    cur.close(); conn.close()
+
+
+# ==========================================================
+# 🗂️ 分区管理: corpus_sentences 按 source_corpus 分区，来源分区内再按语域分区
+# ==========================================================
+def partition_name(source):
+    return "corpus_sentences_" + re.sub(r'[^a-z0-9]', '', source.lower())
+
+def _table_exists(cur, table):
+    cur.execute("SELECT to_regclass(%s)", (table,))
+    return cur.fetchone()[0] is not None
+
+def create_source_table(cur, table, source):
+    """建立一个来源的分区表 (含 _noise / _main 两个语域子分区)，尚未挂到 corpus_sentences 上"""
+    cur.execute(f"""
+        CREATE TABLE {table} (LIKE corpus_sentences INCLUDING DEFAULTS,
+                              CHECK (source_corpus = %s))
+        PARTITION BY LIST (original_genre)
+    """, (source,))
+    noise = ','.join(cur.mogrify("%s", (g,)).decode('utf-8') for g in NOISE_GENRES)
+    cur.execute(f"CREATE TABLE {table}_noise PARTITION OF {table} FOR VALUES IN ({noise})")
+    cur.execute(f"CREATE TABLE {table}_main PARTITION OF {table} DEFAULT")
+
+# 来源分区上的索引 (名称后缀, 定义)，与 corpus_sentences 上的 idx_corpus_* 一一对应。
+# 显式命名: 每个子分区的索引为 <分区表名>_<后缀>，替换导入前后名称保持不变
+SOURCE_INDEXES = [
+    ('words_idx', 'USING GIN (words_array)'),
+    ('id_idx', '(id)'),
+    ('src_genre_idx', '(source_corpus, original_genre)'),
+]
+PARTITION_SUFFIXES = ('', '_noise', '_main')
+
+def create_source_indexes(cur, table):
+    """先在两个语域子分区上建索引，再建父表索引 (ON ONLY + ATTACH)，全部使用稳定名称"""
+    for suffix, definition in SOURCE_INDEXES:
+        cur.execute(f"CREATE INDEX {table}_{suffix} ON ONLY {table} {definition}")
+        for part in PARTITION_SUFFIXES[1:]:
+            cur.execute(f"CREATE INDEX {table}{part}_{suffix} ON {table}{part} {definition}")
+            cur.execute(f"ALTER INDEX {table}_{suffix} ATTACH PARTITION {table}{part}_{suffix}")
+
+def ensure_source_partition(cur, source):
+    """追加导入前确保该来源的分区存在 (新语料库首次导入时自动创建)"""
+    table = partition_name(source)
+    if _table_exists(cur, table): return table
+    create_source_table(cur, table, source)
+    create_source_indexes(cur, table)
+    cur.execute(f"ALTER TABLE corpus_sentences ATTACH PARTITION {table} FOR VALUES IN (%s)", (source,))
+    return table
+
+def swap_source_partition(cur, staging, source):
+    """
+    用已装载完成的 staging 表整体替换该来源的分区 (替代大批量 DELETE)。
+    staging 上预先带有 CHECK 约束与索引，ATTACH 时无需扫描校验、直接复用索引。
+    """
+    table = partition_name(source)
+    if _table_exists(cur, table):
+        cur.execute(f"ALTER TABLE corpus_sentences DETACH PARTITION {table}")
+        cur.execute(f"DROP TABLE {table} CASCADE")
+    cur.execute(f"ALTER TABLE corpus_sentences ATTACH PARTITION {staging} FOR VALUES IN (%s)", (source,))
+    for part in PARTITION_SUFFIXES:
+        cur.execute(f"ALTER TABLE {staging}{part} RENAME TO {table}{part}")
+        # 索引随表改名，避免留下 _staging 名称、下次导入时与新 staging 索引冲突
+        for suffix, _ in SOURCE_INDEXES:
+            cur.execute(f"ALTER INDEX {staging}{part}_{suffix} RENAME TO {table}{part}_{suffix}")
+
+
+class PipelineError(RuntimeError):
+    """某个阶段/写入进程异常退出，导入中止"""
+
+
+def _check_workers(groups):
+    for procs in groups:
+        for p in procs:
+            if p.exitcode not in (None, 0):
+                raise PipelineError(f"{p.name} 异常退出 (exitcode={p.exitcode})")
+
+def _put(q, item, groups):
+    """带超时的 put: 下游进程已死时不会在满队列上永久阻塞"""
+    while True:
+        try:
+            q.put(item, timeout=POLL_INTERVAL)
+            return
+        except queue.Full:
+            _check_workers(groups)
+
+def _join(procs, groups):
+    for p in procs:
+        while p.is_alive():
+            p.join(POLL_INTERVAL)
+            _check_workers(groups)
+    _check_workers(groups)
+
+
+def invalidate_profile_counts(cur):
+    """
+    替换式导入后旧句子整体消失、新句子获得新 id，已有的计数状态不再对应当前语料。
+    删除水位线并清空 count_state: sync 拒绝运行，build 会重新计算全部单词。
+    """
+    if _table_exists(cur, 'nuance_meta'):
+        cur.execute("DELETE FROM nuance_meta WHERE key = %s", (WATERMARK_KEY,))
+    if _table_exists(cur, 'word_nuance_profiles'):
+        cur.execute("UPDATE word_nuance_profiles SET count_state = NULL WHERE count_state IS NOT NULL")
+
+
+def run_pipeline(reader, workers=DEFAULT_WORKERS, replace=True):
+    """
+    流式导入: reader → segment → tokenize → filter → writer
+    每个阶段 `workers` 个进程，阶段之间通过有界队列连接。
+    replace=True 时写入独立的 staging 分区，完成后整体换入；否则直接追加。
+    返回写入的句子数。
+    """
+    files = reader.discover()
+    print(f"📚 [{reader.source}] 发现 {len(files)} 个文件 | 每阶段 {workers} 个进程")
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    # 会话级锁，随连接关闭释放
+    cur.execute("SELECT pg_advisory_lock_shared(%s)", (IMPORT_LOCK_ID,))
+    if replace:
+        table = partition_name(reader.source) + "_staging"
+        cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+        create_source_table(cur, table, reader.source)
+    else:
+        table = ensure_source_partition(cur, reader.source)
+    conn.commit()
+
+    queues = [mp.Queue(maxsize=QUEUE_MAXSIZE) for _ in range(len(STAGES) + 1)]
+    counter = mp.Value('i', 0)
+    failed = mp.Value('i', 0)
+
+    groups = []
+    for i, (name, fn, chunk_size) in enumerate(STAGES):
+        procs = [mp.Process(target=_transform_worker, args=(name, fn, chunk_size, reader, queues[i], queues[i + 1]),
+                            name=f"{name}-{j}", daemon=True)
+                 for j in range(workers)]
+        groups.append(procs)
+    groups.append([mp.Process(target=_writer_worker, args=(reader, queues[-1], table, counter, failed),
+                              name=f"writer-{j}", daemon=True)
+                   for j in range(workers)])
+
+    for procs in groups:
+        for p in procs: p.start()
+
+    try:
+        # 文件路径按小块送入 (每块几个文件，保证读取阶段负载均衡)
+        for i in range(0, len(files), 4):
+            _put(queues[0], files[i:i + 4], groups)
+
+        # 逐阶段收尾: 上游全部结束后，再通知下游的每个进程退出
+        for i, procs in enumerate(groups):
+            for _ in procs: _put(queues[i], _SENTINEL, groups)
+            _join(procs, groups)
+    except PipelineError as e:
+        # 任一进程异常退出: 终止其余进程，丢弃未完成的 staging 表
+        for procs in groups:
+            for p in procs:
+                if p.is_alive(): p.terminate()
+        print(f"\n❌ [{reader.source}] 导入中止: {e}")
+        if replace:
+            cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+            conn.commit()
+        cur.close(); conn.close()
+        raise
+
+    if replace and failed.value:
+        # 不完整的 staging 不能替换现有分区，保留旧数据
+        cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+        conn.commit()
+        cur.close(); conn.close()
+        raise PipelineError(f"{failed.value} 句写入失败，已放弃替换 [{reader.source}] 分区 (旧数据保持不变)")
+    if failed.value:
+        print(f"\n⚠️ [{reader.source}] 追加导入中有 {failed.value} 句写入失败")
+
+    if replace:
+        # 先在 staging 上建索引，换入时只是元数据操作
+        print(f"\n🔧 [{reader.source}] 正在为新分区建立索引...")
+        create_source_indexes(cur, table)
+        conn.commit()
+        swap_source_partition(cur, table, reader.source)
+        invalidate_profile_counts(cur)
+        conn.commit()
+        print(f"🔁 [{reader.source}] 分区已换入 (旧数据整体丢弃)")
+        print(f"⚠️ 单词计数状态已失效，请运行: python -m scripts.update_profiles build")
+    cur.close(); conn.close()
+
+    print(f"\n✅ [{reader.source}] 导入完成，共 {counter.value} 句。")
+    return counter.value
+
+
+def main():
+    # 以 python -m 运行时本文件是 __main__，而内置 Reader 注册到的是 scripts.corpus_pipeline 模块，
+    # 因此注册表与流水线统一从后者取用
+    from scripts import corpus_pipeline as pipeline
+    pipeline.load_builtin_readers()
+    parser = argparse.ArgumentParser(description="Corpus import pipeline")
+    parser.add_argument('format', choices=sorted(pipeline.READERS))
+    parser.add_argument('path', nargs='?', help="语料根目录 (内置格式可省略)")
+    parser.add_argument('--source', help="source_corpus 标记 (默认取 Reader 的设置)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--append', action='store_true', help="追加导入，不清除同来源旧数据")
+    args = parser.parse_args()
+
+    reader_cls = pipeline.READERS[args.format]
+    root = args.path or getattr(reader_cls, 'default_root', None)
+    if not root:
+        print("❌ 请指定语料目录"); sys.exit(1)
+
+    reader = reader_cls(root, source=args.source)
+    pipeline.run_pipeline(reader, workers=args.workers, replace=not args.append)
+
+if __name__ == "__main__":
+    main()
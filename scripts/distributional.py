@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import numpy as np
+import psycopg2
+from scipy import sparse
+from scripts.lexicon import load_lemma_map
+from scripts.corpus_pipeline import NOISE_GENRES
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VECTORS_PATH = os.path.join(BASE_DIR, 'data', 'ppmi_vectors.npz')
+
+WINDOW = 2            # 左右各 2 个词作为上下文
+MIN_COUNT = 5         # 出现次数过少的词不生成向量
+CONTEXT_ALPHA = 0.75  # 上下文分布平滑 (降低罕见上下文的 PMI 偏高问题)
+SVD_DIMS = 300        # 0 表示不降维，直接保存稀疏 PPMI 向量
+BATCH_SIZE = 20000    # 每批读取的句子数
+STOPWORDS = {
+    'the','a','an','and','or','but','is','are','was','were','be','been',
+    'this','that','it','he','she','they','we','i','you','my','your',
+    'in','on','at','to','for','of','with','by'
+}
+
+
+def _count_batch(sent_ids, lengths, vocab_size):
+    """
+    一批句子的共现计数 (向量化)：把所有 token 拼成一条长数组，
+    对每个窗口偏移量 d 取 (k, k+d) 位置对，只保留同一句子内且两端都在词表中的对。
+    """
+    ids = np.concatenate(sent_ids)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    rows, cols = [], []
+    for d in range(1, WINDOW + 1):
+        if len(ids) <= d: break
+        a, b = ids[:-d], ids[d:]
+        mask = (owner[:-d] == owner[d:]) & (a >= 0) & (b >= 0)
+        rows += [a[mask], b[mask]]
+        cols += [b[mask], a[mask]]
+    if not rows:
+        return sparse.csr_matrix((vocab_size, vocab_size), dtype=np.float64)
+    r = np.concatenate(rows); c = np.concatenate(cols)
+    return sparse.coo_matrix((np.ones(len(r)), (r, c)), shape=(vocab_size, vocab_size)).tocsr()
+
+
+def ppmi(counts):
+    """共现计数矩阵 -> PPMI 矩阵 (只对非零项计算，保持稀疏)"""
+    counts = counts.tocoo()
+    total = counts.sum()
+    row_sum = np.asarray(counts.sum(axis=1)).ravel()
+    ctx = np.asarray(counts.sum(axis=0)).ravel() ** CONTEXT_ALPHA
+    ctx_p = ctx / ctx.sum()
+    p_ij = counts.data / total
+    pmi = np.log(p_ij / ((row_sum[counts.row] / total) * ctx_p[counts.col]))
+    keep = pmi > 0
+    return sparse.csr_matrix((pmi[keep], (counts.row[keep], counts.col[keep])), shape=counts.shape)
+
+
+def build_vectors(path=VECTORS_PATH, dims=SVD_DIMS):
+    """
+    离线任务: 从 corpus_sentences 统计词元共现 -> PPMI -> (可选) 截断 SVD -> 归一化后写入 .npz
+    """
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    lemma_map = load_lemma_map(cur)
+    cur.execute("SELECT spelling FROM words")
+    vocab = sorted({r[0].lower() for r in cur.fetchall()} - STOPWORDS)
+    index = {w: i for i, w in enumerate(vocab)}
+    V = len(vocab)
+    print(f"📐 [PPMI] 词表 {V} 个词元，窗口 ±{WINDOW}")
+
+    # 服务端游标流式读取，内存只保留一批句子
+    stream = conn.cursor(name='ppmi_stream')
+    stream.itersize = BATCH_SIZE
+    stream.execute("SELECT words_array FROM corpus_sentences WHERE original_genre NOT IN %s", (NOISE_GENRES,))
+
+    counts = sparse.csr_matrix((V, V), dtype=np.float64)
+    freq = np.zeros(V, dtype=np.int64)
+    batch_ids, batch_lens, n = [], [], 0
+    start = time.time()
+    for (words_arr,) in stream:
+        ids = np.fromiter((index.get(lemma_map.get(w, w), -1) for w in words_arr), dtype=np.int64, count=len(words_arr))
+        batch_ids.append(ids); batch_lens.append(len(ids))
+        n += 1
+        if len(batch_ids) >= BATCH_SIZE:
+            flat = np.concatenate(batch_ids)
+            freq += np.bincount(flat[flat >= 0], minlength=V)
+            counts = counts + _count_batch(batch_ids, batch_lens, V)
+            batch_ids, batch_lens = [], []
+            print(f"\r⏳ 已处理 {n} 句 | {time.time() - start:.0f}s", end="")
+    if batch_ids:
+        flat = np.concatenate(batch_ids)
+        freq += np.bincount(flat[flat >= 0], minlength=V)
+        counts = counts + _count_batch(batch_ids, batch_lens, V)
+    conn.close()
+    print(f"\n✅ 共现统计完成: {n} 句, {counts.nnz} 个非零项")
+
+    # 只为足够常见的词保留向量
+    keep = np.where(freq >= MIN_COUNT)[0]
+    matrix = ppmi(counts)[keep]
+    words = np.array([vocab[i] for i in keep])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if dims and dims < min(matrix.shape) - 1:
+        from scipy.sparse.linalg import svds
+        print(f"🔧 截断 SVD -> {dims} 维 ...")
+        u, s, _ = svds(matrix, k=dims)
+        vectors = (u * np.sqrt(s)).astype(np.float32)  # 奇异值开方加权
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8
+        np.savez_compressed(path, words=words, vectors=vectors)
+    else:
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()) + 1e-8
+        matrix = sparse.diags(1 / norms) @ matrix
+        matrix = matrix.astype(np.float32).tocsr()
+        np.savez_compressed(path, words=words, data=matrix.data, indices=matrix.indices,
+                            indptr=matrix.indptr, shape=matrix.shape)
+    print(f"🎉 向量已写入 {path} ({len(words)} 个词, {os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+
+class DistributionalIndex:
+    """
+    加载 PPMI/SVD 向量 (行已归一化)，点积即余弦相似度。
+    稠密 (SVD) 与稀疏 (原始 PPMI) 两种文件格式都支持。
+    """
+
+    def __init__(self, path=VECTORS_PATH):
+        data = np.load(path)
+        self.words = [str(w) for w in data['words']]
+        self.row = {w: i for i, w in enumerate(self.words)}
+        if 'vectors' in data:
+            self.vectors = data['vectors']
+        else:
+            self.vectors = sparse.csr_matrix((data['data'], data['indices'], data['indptr']),
+                                             shape=tuple(data['shape']))
+
+    def __contains__(self, word):
+        return word in self.row
+
+    def _scores(self, rows, word):
+        v = self.vectors[self.row[word]]
+        res = self.vectors[rows] @ v.T
+        return res.toarray().ravel() if sparse.issparse(res) else np.asarray(res).ravel()
+
+    def similarity(self, word, candidates):
+        """-> {candidate: cosine}，无向量的候选不出现在结果中"""
+        if word not in self.row: return {}
+        cands = [c for c in candidates if c in self.row]
+        if not cands: return {}
+        scores = self._scores([self.row[c] for c in cands], word)
+        return {c: float(s) for c, s in zip(cands, scores)}
+
+    def neighbours(self, word, k=20):
+        """语料中用法最接近的词 -> [(word, cosine)]"""
+        if word not in self.row: return []
+        scores = self._scores(slice(None), word)
+        scores[self.row[word]] = -1
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.words[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+def main():
+    # python -m scripts.distributional build [dims]
+    # python -m scripts.distributional neighbours <word>
+    if len(sys.argv) < 2: return
+    if sys.argv[1] == 'build':
+        build_vectors(dims=int(sys.argv[2]) if len(sys.argv) > 2 else SVD_DIMS)
+    elif sys.argv[1] == 'neighbours' and len(sys.argv) > 2:
+        idx = DistributionalIndex()
+        for w, s in idx.neighbours(sys.argv[2]):
+            print(f"   • {w.ljust(15)} {s:.3f}")
+
+if __name__ == "__main__":
+    main()
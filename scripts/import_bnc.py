@@ -1,17 +1,11 @@
 import os
-import psycopg2
 import re
-from glob import glob
 import xml.etree.ElementTree as ET
+from scripts.corpus_pipeline import CorpusReader, register_reader, run_pipeline, DEFAULT_WORKERS
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 BNC_PATH = os.path.join(BASE_DIR, 'data', 'BNC', 'Texts')
 
-DB_CONFIG = {
-    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432", 
-    "host": "localhost", "options": "-c client_encoding=utf8"
-}
-
 # BNC 分类代码映射表 (Codes -> Readable Genres)
 GENRE_MAP = {
     'WRIDOM1': 'Literature', 
@@ -55,9 +49,10 @@ def robust_extract_genre(filepath):
     except Exception:
         return 'Unclassified'
 
-def parse_sentences(filepath):
+def parse_sentence_parts(filepath):
     """
     解析句子：仍然使用 XML 解析，保证句子完整性
+    返回每个 <s> 的片段列表 (单词 + 标点)
     """
     try:
         tree = ET.parse(filepath)
@@ -70,66 +65,43 @@ def parse_sentences(filepath):
             for node in s.iter():
                 if node.tag in ('w', 'c', 'mw') and node.text:
                     parts.append(node.text.strip())
-            
             if parts:
-                text = " ".join(parts)
-                # 过滤太短的碎片
-                if len(parts) > 3:
-                    # 简单分词数组 (用于索引)
-                    words_arr = [w.lower() for w in parts if w.isalnum()]
-                    if words_arr:
-                        sents.append((text, words_arr))
+                sents.append(parts)
         return sents
     except:
         return []
 
-def run_import():
-    print("🚑 [Fix Phase] 开始修复 BNC 数据...")
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
+@register_reader('bnc')
+class BNCReader(CorpusReader):
+    """
+    BNC XML：分类来自文件头代码，分句与分词直接沿用 XML 中的 <s>/<w>/<c> 标注
+    """
+    source = 'BNC'
+    file_pattern = '*.xml'
+    default_root = BNC_PATH
 
-    # 1. 清理旧 BNC 数据
-    print("🧹 正再清除旧的 BNC 错误数据...")
-    cur.execute("DELETE FROM corpus_sentences WHERE source_corpus = 'BNC'")
-    conn.commit()
-    print("✅ 清理完成。")
+    def genre_of(self, filepath):
+        return robust_extract_genre(filepath)
 
-    # 2. 重新导入
-    files = glob(os.path.join(BNC_PATH, '**', '*.xml'), recursive=True)
-    print(f"📚 重新扫描 {len(files)} 个文件...")
-    
-    buffer = []
-    total_saved = 0
-    
-    for i, fpath in enumerate(files):
-        fid = os.path.basename(fpath)
-        
-        # 提取分类 (使用新逻辑)
-        real_genre = robust_extract_genre(fpath)
-        
-        # 提取句子
-        sents = parse_sentences(fpath)
-        
-        for text, words_arr in sents:
-            buffer.append((text, words_arr, 'BNC', real_genre, fid))
-            
-        # 批量写入
-        if len(buffer) >= 2000:
-            args = ','.join(cur.mogrify("(%s,%s,%s,%s,%s)", x).decode('utf-8') for x in buffer)
-            cur.execute(f"INSERT INTO corpus_sentences (sentence_text, words_array, source_corpus, original_genre, file_id) VALUES {args}")
-            conn.commit()
-            total_saved += len(buffer)
-            buffer = []
-            print(f"\r⏳ 修复进度: {i}/{len(files)} | 当前: {real_genre.ljust(15)} | 已存: {total_saved}", end="")
+    def read(self, filepath):
+        return parse_sentence_parts(filepath)
+
+    def segment(self, raw):
+        # 过滤太短的碎片
+        for parts in raw:
+            if len(parts) >= self.min_tokens:
+                yield parts
 
-    # 尾部处理
-    if buffer:
-        args = ','.join(cur.mogrify("(%s,%s,%s,%s,%s)", x).decode('utf-8') for x in buffer)
-        cur.execute(f"INSERT INTO corpus_sentences (sentence_text, words_array, source_corpus, original_genre, file_id) VALUES {args}")
-        conn.commit()
+    def tokenize(self, parts):
+        text = " ".join(parts)
+        # 简单分词数组 (用于索引)
+        words_arr = [w.lower() for w in parts if w.isalnum()]
+        return text, words_arr
 
-    print(f"\n🎉 BNC 数据修复完成！Unclassified 比例应大幅下降。")
-    cur.close(); conn.close()
+def run_import(workers=DEFAULT_WORKERS):
+    print("🚑 [Fix Phase] 开始修复 BNC 数据...")
+    run_pipeline(BNCReader(BNC_PATH), workers=workers)
+    print(f"🎉 BNC 数据修复完成！Unclassified 比例应大幅下降。")
 
 if __name__ == "__main__":
     run_import()
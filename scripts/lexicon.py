@@ -0,0 +1,16 @@
+import re
+
+# 只依赖标准库: 快照模式 / 拼写回退等查询侧代码从这里导入，
+# 不会触发 analyzer 的 NLTK 资源下载与标注进程池
+
+
+def load_lemma_map(cur):
+    """根据 words.exchange 建立 {词形变体: 原形} 映射 (thought -> think)"""
+    lemma_db = {}
+    cur.execute("SELECT spelling, exchange FROM words WHERE exchange IS NOT NULL AND exchange != ''")
+    for base, exc in cur.fetchall():
+        base = base.lower()
+        variants = re.findall(r':[a-zA-Z\-]+', exc)
+        for v in variants:
+            lemma_db[v[1:].lower()] = base
+    return lemma_db
@@ -0,0 +1,88 @@
+import os
+import multiprocessing as mp
+from collections import OrderedDict
+from nltk.tag.perceptron import PerceptronTagger
+
+BATCH_SIZE = 256          # 每个任务包含的句子数
+POOL_THRESHOLD = 512      # 待标注句子少于该值时直接在本进程标注，省去进程间传输
+CACHE_SIZE = 20000        # LRU 缓存的句子数 (按句子 id)；每句约 2-3 KB，默认约 50 MB
+
+# 工作进程内常驻的标注器 (进程启动时加载一次)
+_worker_tagger = None
+
+def _init_worker():
+    global _worker_tagger
+    _worker_tagger = PerceptronTagger()
+
+def _tag_batch(sents):
+    return _worker_tagger.tag_sents(sents)
+
+
+class BatchTagger:
+    """
+    批量词性标注：
+    - 以句子 id (没有 id 时用句子文本) 为键做有界 LRU 记忆，
+      同一句子在不同单词的计算之间复用标注结果
+    - 未命中的句子按批分发到常驻标注器的进程池 (nltk.pos_tag 每次调用都会重新构建标注器)
+    - 小批量直接在本进程内用已加载的标注器完成
+    """
+
+    def __init__(self, processes=None, batch_size=BATCH_SIZE, cache_size=CACHE_SIZE):
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self._pool = None
+        self._local = None
+
+    def _local_tagger(self):
+        if self._local is None:
+            self._local = PerceptronTagger()
+        return self._local
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = mp.Pool(self.processes, initializer=_init_worker)
+        return self._pool
+
+    def tag(self, items):
+        """
+        items: [(key, words_arr)] -> {key: [(word, tag), ...]}
+        """
+        result, missing, seen = {}, [], set()
+        for key, words in items:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                result[key] = self.cache[key]
+            elif key not in seen:
+                seen.add(key)
+                missing.append((key, words))
+
+        if missing:
+            sents = [list(words) for _, words in missing]
+            tagged = None
+            if self.processes > 1 and len(missing) >= POOL_THRESHOLD:
+                batches = [sents[i:i + self.batch_size] for i in range(0, len(sents), self.batch_size)]
+                try:
+                    tagged = [t for batch in self._get_pool().map(_tag_batch, batches) for t in batch]
+                except Exception as e:
+                    # 进程池出错: 丢弃进程池，本批改在本进程内标注 (本地标注器出错则向上抛出)
+                    print(f"\n⚠️ 标注进程池出错，改为本进程标注: {e}")
+                    self._pool.terminate()
+                    self._pool = None
+            if tagged is None:
+                tagged = self._local_tagger().tag_sents(sents)
+
+            for (key, _), t in zip(missing, tagged):
+                result[key] = t
+                self.cache[key] = t
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return result
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import time
+import statistics
+from collections import defaultdict
+import psycopg2
+from scripts.lexicon import load_lemma_map
+from scripts.corpus_pipeline import NOISE_GENRES
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_DIR = os.path.join(BASE_DIR, 'data', 'diagnostics')
+BASELINE_PATH = os.path.join(REPORT_DIR, 'query_baseline.json')
+
+STRATEGIES = ('PATTERN', 'LINEAR', 'PHRASAL', 'BASIC')
+# BNC 词频段 (bnc_rank 区间，None 表示不设上限)
+FREQ_BANDS = {
+    'top1k': (1, 1000),
+    '1k-5k': (1001, 5000),
+    '5k-20k': (5001, 20000),
+    'rare': (20001, None),
+}
+SAMPLE_PERCENTILES = (0.1, 0.5, 0.9)   # 每个格子在段内按 bnc_rank 取这几个分位点的词
+REPEAT = 3                 # 每条查询执行次数，取中位数
+LATENCY_FACTOR = 1.5       # 比基线慢 50% 以上视为回退
+LATENCY_FLOOR_MS = 2.0     # 且绝对差值超过 2ms (过滤亚毫秒级抖动)
+
+# 项目中的规范查询 (与调用处的 SQL 保持一致)
+# 每项: (SQL, 参数构造函数(word, ctx))
+QUERIES = {
+    # update_profiles.build_profiles: 按词形取语料 (idx_corpus_words GIN + 噪音语域分区裁剪)
+    'corpus_fetch': ("""
+        SELECT sentence_text, words_array, source_corpus, original_genre, id
+        FROM corpus_sentences
+        WHERE words_array && %s::text[] AND id <= %s
+          AND original_genre NOT IN %s
+    """, lambda w, ctx: (sorted(ctx['forms'][w['spelling']] | {w['spelling']}), ctx['watermark'], NOISE_GENRES)),
+
+    # SynonymEngine.get_word
+    'word_lookup': ("""
+        SELECT id, processing_strategy, definition_cn, bnc_rank FROM words WHERE spelling = %s
+    """, lambda w, ctx: (w['spelling'],)),
+
+    # SynonymEngine.get_profile
+    'profile_lookup': ("""
+        SELECT register_stats, analysis_data FROM word_nuance_profiles WHERE word_id = %s
+    """, lambda w, ctx: (w['id'],)),
+
+    # SynonymEngine.duel_words: 两个词的 JSONB profile 连接
+    'duel_join': ("""
+        SELECT w.spelling, p.register_stats, p.analysis_data, w.processing_strategy
+        FROM words w
+        JOIN word_nuance_profiles p ON w.id = p.word_id
+        WHERE w.spelling IN (%s, %s)
+    """, lambda w, ctx: (w['spelling'], ctx['partner'][w['spelling']])),
+
+    # SynonymEngine.get_synonyms_scored: 候选词的数据库验证
+    'synonym_validate': ("""
+        SELECT w.id, w.spelling, w.definition_cn, w.bnc_rank
+        FROM words w
+        JOIN word_nuance_profiles p ON w.id = p.word_id
+        WHERE w.spelling = ANY(%s) AND p.is_analyzed = TRUE
+    """, lambda w, ctx: (ctx['candidates'],)),
+
+    # TextAnnotator: 每个词的 Top-N 近义词
+    'annotate_synonyms': ("""
+        SELECT word_id, spelling, score FROM (
+            SELECT ws.word_id, s.spelling, ws.score,
+                   ROW_NUMBER() OVER (PARTITION BY ws.word_id ORDER BY ws.score DESC, s.bnc_rank) AS rn
+            FROM word_synonyms ws
+            JOIN words s ON s.id = ws.synonym_id
+            WHERE ws.word_id = ANY(%s)
+        ) t WHERE rn <= %s
+    """, lambda w, ctx: ([w['id']], 3)),
+
+    # usage_index.items_of_word
+    'usage_items': ("""
+        SELECT u.item, SUM(u.count) AS total
+        FROM word_usage_items u
+        JOIN words w ON w.id = u.word_id
+        WHERE w.spelling = %s AND u.item_type = %s
+        GROUP BY u.item ORDER BY total DESC LIMIT %s
+    """, lambda w, ctx: (w['spelling'], 'pattern' if w['strategy'] == 'PATTERN' else 'obj', 20)),
+}
+
+
+def sample_words(cur, pinned=None):
+    """
+    每个 策略 × 词频段 按 SAMPLE_PERCENTILES 取多个代表词 (段内按 bnc_rank 排序后的分位点)。
+    不要求已有 profile: 未分析的词 (PHRASAL / BASIC) 同样要覆盖。
+    pinned: 基线中的词表，存在时沿用，保证两次运行比较的是同一批词。
+    """
+    if pinned:
+        cur.execute("SELECT id, spelling, processing_strategy, bnc_rank FROM words WHERE spelling = ANY(%s)",
+                    ([w['spelling'] for w in pinned],))
+        found = {r[1]: r for r in cur.fetchall()}
+        return [dict(w, id=found[w['spelling']][0]) for w in pinned if w['spelling'] in found]
+
+    samples = []
+    for strategy in STRATEGIES:
+        for band, (lo, hi) in FREQ_BANDS.items():
+            cur.execute("""
+                WITH cell AS (
+                    SELECT id, spelling, bnc_rank,
+                           ROW_NUMBER() OVER (ORDER BY bnc_rank, spelling) - 1 AS pos,
+                           COUNT(*) OVER () AS n
+                    FROM words
+                    WHERE processing_strategy = %s AND bnc_rank >= %s AND (%s::int IS NULL OR bnc_rank <= %s)
+                )
+                SELECT id, spelling, bnc_rank, pos, n FROM cell
+                WHERE pos IN (SELECT floor(p * (n - 1)) FROM unnest(%s::float8[]) AS p)
+                ORDER BY pos
+            """, (strategy, lo, hi, hi, list(SAMPLE_PERCENTILES)))
+            for wid, spelling, rank, pos, n in cur.fetchall():
+                samples.append({"id": wid, "spelling": spelling, "rank": rank, "strategy": strategy, "band": band,
+                                "percentile": round(pos / max(n - 1, 1), 2)})
+    return samples
+
+
+def empty_cells(words):
+    """没有任何代表词的 策略 × 词频段 格子"""
+    covered = {(w['strategy'], w['band']) for w in words}
+    return [f"{s}/{b}" for s in STRATEGIES for b in FREQ_BANDS if (s, b) not in covered]
+
+
+def index_roots(cur):
+    """分区索引 -> 最顶层父索引 (如 corpus_sentences_bnc_main_words_idx -> idx_corpus_words)"""
+    cur.execute("""
+        WITH RECURSIVE up(child, top) AS (
+            SELECT h.inhrelid, h.inhparent FROM pg_inherits h
+            JOIN pg_class c ON c.oid = h.inhrelid WHERE c.relkind IN ('i', 'I')
+            UNION ALL
+            SELECT up.child, h.inhparent FROM up JOIN pg_inherits h ON h.inhrelid = up.top
+        )
+        SELECT c.relname, t.relname FROM up
+        JOIN pg_class c ON c.oid = up.child
+        JOIN pg_class t ON t.oid = up.top
+        WHERE NOT EXISTS (SELECT 1 FROM pg_inherits h WHERE h.inhrelid = up.top)
+    """)
+    return dict(cur.fetchall())
+
+
+def plan_shape(node, roots=None):
+    """
+    计划树 -> 紧凑的结构字符串 (节点类型 + 表/索引)，只反映执行方式，不含代价与行数。
+    roots: index_roots() 的结果；分区索引按父索引名记录，分区重建/改名不会被误判为计划变化。
+    """
+    roots = roots or {}
+    label = node['Node Type']
+    target = node.get('Index Name')
+    target = roots.get(target, target) if target else node.get('Relation Name')
+    if target: label += f":{target}"
+    children = [plan_shape(c, roots) for c in node.get('Plans', [])]
+    return f"{label}({', '.join(children)})" if children else label
+
+
+def seq_scans(node):
+    """计划树中所有顺序扫描的表"""
+    found = [node['Relation Name']] if node['Node Type'] == 'Seq Scan' else []
+    for c in node.get('Plans', []):
+        found += seq_scans(c)
+    return found
+
+
+def explain(cur, sql, params, roots=None):
+    """EXPLAIN (ANALYZE, BUFFERS) 执行 REPEAT 次 -> 单条查询的计时与计划摘要"""
+    runs = []
+    for _ in range(REPEAT):
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        runs.append(cur.fetchone()[0][0])
+    plan = runs[-1]['Plan']
+    return {
+        "execution_ms": round(statistics.median(r['Execution Time'] for r in runs), 3),
+        "planning_ms": round(statistics.median(r['Planning Time'] for r in runs), 3),
+        "rows": plan.get('Actual Rows'),
+        "shared_hit": plan.get('Shared Hit Blocks', 0),
+        "shared_read": plan.get('Shared Read Blocks', 0),
+        "shape": plan_shape(plan, roots),
+        "seq_scans": sorted(set(seq_scans(plan))),
+    }
+
+
+def run_diagnostics(baseline=None):
+    """对每个代表词执行全部规范查询 -> 报告 dict"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.set_session(readonly=True)  # EXPLAIN ANALYZE 会真实执行查询，只读事务兜底
+    cur = conn.cursor()
+
+    words = sample_words(cur, baseline and baseline.get('words'))
+    if not words:
+        conn.close()
+        raise RuntimeError("没有可用的代表词 (words 表为空?)")
+    missing = empty_cells(words)
+    if missing:
+        print(f"⚠️ 以下格子没有可用的词，未被覆盖: {', '.join(missing)}")
+
+    forms = defaultdict(set)
+    for variant, base in load_lemma_map(cur).items():
+        forms[base].add(variant)
+    roots = index_roots(cur)
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM corpus_sentences")
+    ctx = {
+        "forms": forms,
+        "watermark": cur.fetchone()[0],
+        # duel: 与下一个代表词配对; 近义词验证: 全部代表词作为候选列表
+        "partner": {w['spelling']: words[(i + 1) % len(words)]['spelling'] for i, w in enumerate(words)},
+        "candidates": [w['spelling'] for w in words],
+    }
+
+    print(f"🩺 [Diagnostics] {len(words)} 个代表词 × {len(QUERIES)} 条查询 (每条 {REPEAT} 次)")
+    results = {}
+    for name, (sql, make_params) in QUERIES.items():
+        results[name] = {}
+        for w in words:
+            results[name][w['spelling']] = explain(cur, sql, make_params(w, ctx), roots)
+        times = [r['execution_ms'] for r in results[name].values()]
+        print(f"   • {name.ljust(18)} 中位 {statistics.median(times):8.2f} ms | 最慢 {max(times):8.2f} ms")
+        conn.rollback()
+    conn.close()
+
+    return {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "words": [{k: w.get(k) for k in ('spelling', 'rank', 'strategy', 'band', 'percentile')} for w in words],
+        "empty_cells": missing,
+        "results": results,
+    }
+
+
+def compare(report, baseline=None):
+    """-> [问题描述]: 顺序扫描、与基线相比的计划变化和延迟回退"""
+    issues = []
+    base = (baseline or {}).get('results', {})
+    for name, per_word in report['results'].items():
+        for word, r in per_word.items():
+            tag = f"{name} [{word}]"
+            if r['seq_scans']:
+                issues.append(f"{tag}: 顺序扫描 {', '.join(r['seq_scans'])}")
+            old = base.get(name, {}).get(word)
+            if not old: continue
+            if old['shape'] != r['shape']:
+                issues.append(f"{tag}: 计划变化\n        基线: {old['shape']}\n        当前: {r['shape']}")
+            if (r['execution_ms'] > old['execution_ms'] * LATENCY_FACTOR
+                    and r['execution_ms'] - old['execution_ms'] > LATENCY_FLOOR_MS):
+                issues.append(f"{tag}: 延迟回退 {old['execution_ms']:.2f} ms -> {r['execution_ms']:.2f} ms")
+    return issues
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path): return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def main():
+    # python -m scripts.query_diagnostics run        对比基线，发现问题时以非零状态退出
+    # python -m scripts.query_diagnostics baseline   以当前结果作为新基线
+    cmd = sys.argv[1] if len(sys.argv) > 1 else 'run'
+    baseline = load_baseline()
+
+    if cmd == 'baseline':
+        # 重新选取代表词 (词表/语料变化后需要重建基线)
+        report = run_diagnostics()
+        save_json(report, BASELINE_PATH)
+        print(f"📌 基线已写入 {BASELINE_PATH}")
+        for issue in compare(report):
+            print(f"   ⚠️ {issue}")
+        return
+
+    if cmd != 'run': return
+    report = run_diagnostics(baseline)
+    issues = compare(report, baseline)
+    report['issues'] = issues
+    path = os.path.join(REPORT_DIR, f"query_report_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    save_json(report, path)
+    print(f"📝 报告已写入 {path}")
+
+    if baseline is None:
+        print("ℹ️ 尚无基线，仅检查顺序扫描。可运行: python -m scripts.query_diagnostics baseline")
+    if issues:
+        print(f"❌ 发现 {len(issues)} 个问题:")
+        for issue in issues:
+            print(f"   ⚠️ {issue}")
+        sys.exit(1)
+    print("✅ 查询计划与延迟均无回退。")
+
+if __name__ == "__main__":
+    main()
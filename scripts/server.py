@@ -0,0 +1,54 @@
+from fastapi import FastAPI, Header, HTTPException, Response
+from pydantic import BaseModel
+from scripts.word_cache import WordCache
+from scripts.autocomplete import Autocompleter
+from scripts.synonym_service import SynonymEngine
+from scripts.text_annotator import TextAnnotator, TOP_SYNONYMS
+
+MAX_TEXT_LENGTH = 100_000  # 约 1.5 万词，足够覆盖一篇长文
+
+app = FastAPI(title="Nuance Engine API")
+
+# 各组件在启动时构建一次，请求路径上只做内存查找 / 批量查询
+cache = WordCache()
+completer = Autocompleter()
+engine = SynonymEngine()
+engine.get_resolver()   # 拼写回退索引 (SymSpell) 构建较慢，不放在首个 404 请求上
+annotator = TextAnnotator()
+
+
+class AnnotateRequest(BaseModel):
+    text: str
+    synonyms: int = TOP_SYNONYMS
+
+
+@app.get("/api/word/{word}")
+def get_word(word: str, if_none_match: str = Header(None), accept_encoding: str = Header('')):
+    status, headers, body = cache.lookup(word, if_none_match, accept_encoding)
+    if status == 404:
+        # 未收录: 附带回退解析结果 (词形还原 / 拼写纠错)
+        raise HTTPException(status_code=404, detail=engine.resolve_word(word))
+    return Response(content=body, status_code=status, headers=headers)
+
+
+@app.get("/api/complete")
+def complete(q: str, k: int = 10):
+    return {"prefix": q, "completions": completer.complete(q, k)}
+
+
+@app.get("/api/resolve/{word}")
+def resolve(word: str):
+    return engine.resolve_word(word)
+
+
+@app.post("/api/annotate")
+def annotate(req: AnnotateRequest):
+    """整段/整页文本的批量标注 (阅读助手)"""
+    if len(req.text) > MAX_TEXT_LENGTH:
+        raise HTTPException(status_code=413, detail=f"text longer than {MAX_TEXT_LENGTH} characters")
+    return annotator.annotate(req.text, max(0, min(req.synonyms, 10)))
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import psycopg2
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_PATH = os.path.join(BASE_DIR, 'data', 'nuance_snapshot.db')
+
+# 设置该环境变量后，SynonymEngine / check_word 改为读取快照，不再连接 Postgres
+SNAPSHOT_ENV = 'NUANCE_SNAPSHOT'
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE words (
+    id INTEGER PRIMARY KEY,
+    spelling TEXT NOT NULL UNIQUE,
+    phonetic TEXT,
+    definition_cn TEXT,
+    exchange TEXT,
+    bnc_rank INTEGER,
+    frq_rank INTEGER,
+    processing_strategy TEXT
+);
+CREATE TABLE word_nuance_profiles (
+    word_id INTEGER PRIMARY KEY,
+    register_stats TEXT,       -- JSON
+    analysis_data TEXT,        -- JSON
+    is_analyzed INTEGER,
+    updated_at TEXT
+);
+CREATE TABLE word_synonyms (
+    word_id INTEGER NOT NULL,
+    synonym_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (word_id, synonym_id)
+) WITHOUT ROWID;
+CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def export_snapshot(path=SNAPSHOT_PATH):
+    """
+    把查询侧需要的数据 (words / word_nuance_profiles / 近义词列表) 导出为单文件 SQLite 快照。
+    先写临时文件，完成后原子替换，读取方不会看到写了一半的快照。
+    """
+    from scripts.synonym_service import SynonymEngine
+
+    print(f"📸 [Snapshot] 开始导出 -> {path}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    if os.path.exists(tmp): os.remove(tmp)
+
+    pg = psycopg2.connect(**DB_CONFIG)
+    cur = pg.cursor()
+    lite = sqlite3.connect(tmp)
+    lite.executescript(SNAPSHOT_SCHEMA)
+
+    # 1. 单词表
+    cur.execute("""
+        SELECT id, spelling, phonetic, definition_cn, exchange, bnc_rank, frq_rank, processing_strategy
+        FROM words
+    """)
+    words = cur.fetchall()
+    lite.executemany("INSERT INTO words VALUES (?,?,?,?,?,?,?,?)", words)
+    print(f"   ✅ words: {len(words)}")
+
+    # 2. 分析结果 (JSONB 转为 JSON 文本)
+    cur.execute("SELECT word_id, register_stats, analysis_data, is_analyzed, updated_at FROM word_nuance_profiles")
+    profiles = [(wid, json.dumps(reg, ensure_ascii=False), json.dumps(ana, ensure_ascii=False),
+                 int(bool(done)), ts.isoformat() if ts else None)
+                for wid, reg, ana, done, ts in cur.fetchall()]
+    lite.executemany("INSERT INTO word_nuance_profiles VALUES (?,?,?,?,?)", profiles)
+    print(f"   ✅ profiles: {len(profiles)}")
+    pg.close()
+
+    # 3. 近义词列表 (预先计算，快照侧不需要 WordNet)
+    engine = SynonymEngine()
+    count = 0
+    for i, (wid, spelling) in enumerate((w[0], w[1]) for w in words):
+        syns = engine.get_synonyms_scored(spelling)
+        lite.executemany("INSERT OR IGNORE INTO word_synonyms VALUES (?,?,?)",
+                         [(wid, s['id'], s['score']) for s in syns])
+        count += len(syns)
+        if i % 500 == 0:
+            print(f"\r   ⏳ 近义词: {i}/{len(words)} | {count} 条", end="")
+    print(f"\n   ✅ synonyms: {count}")
+
+    lite.executemany("INSERT INTO snapshot_meta VALUES (?,?)", [
+        ('created_at', time.strftime('%Y-%m-%dT%H:%M:%S')),
+        ('format_version', '1'),
+    ])
+    lite.commit()
+    lite.execute("VACUUM")
+    lite.close()
+    os.replace(tmp, path)
+    print(f"🎉 快照导出完成 ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+
+class SnapshotStore:
+    """
+    只读快照访问层。以 immutable 方式打开 SQLite 文件，
+    由操作系统页缓存承担缓存，查询无网络往返。
+    方法的返回形状与 Postgres 路径保持一致。
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"快照不存在: {path}")
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        self._lemma_map = None
+
+    def lemma_of(self, word):
+        """用快照中的 exchange 字段还原原形 (替代 WordNet 词形还原)"""
+        if self._lemma_map is None:
+            from scripts.lexicon import load_lemma_map
+            self._lemma_map = load_lemma_map(self.conn.cursor())
+        return self._lemma_map.get(word.lower(), word.lower())
+
+    def get_word(self, spelling):
+        """-> (id, processing_strategy, definition_cn, bnc_rank)"""
+        return self.conn.execute(
+            "SELECT id, processing_strategy, definition_cn, bnc_rank FROM words WHERE spelling = ?",
+            (spelling,)).fetchone()
+
+    def get_profile(self, word_id):
+        """-> (register_stats, analysis_data)"""
+        row = self.conn.execute(
+            "SELECT register_stats, analysis_data FROM word_nuance_profiles WHERE word_id = ?",
+            (word_id,)).fetchone()
+        if not row: return None
+        return json.loads(row[0] or '{}'), json.loads(row[1] or '{}')
+
+    def get_synonyms(self, spelling):
+        rows = self.conn.execute("""
+            SELECT s.id, s.spelling, s.definition_cn, s.bnc_rank, ws.score
+            FROM words w
+            JOIN word_synonyms ws ON ws.word_id = w.id
+            JOIN words s ON s.id = ws.synonym_id
+            WHERE w.spelling = ?
+        """, (spelling,)).fetchall()
+        results = [{"id": r[0], "spelling": r[1], "def": r[2], "rank": r[3], "score": r[4]} for r in rows]
+        results.sort(key=lambda x: (x['score'], -x['rank']), reverse=True)
+        return results
+
+    def get_duel_rows(self, word_a, word_b):
+        """-> [(spelling, register_stats, analysis_data, processing_strategy)]"""
+        rows = self.conn.execute("""
+            SELECT w.spelling, p.register_stats, p.analysis_data, w.processing_strategy
+            FROM words w
+            JOIN word_nuance_profiles p ON w.id = p.word_id
+            WHERE w.spelling IN (?, ?)
+        """, (word_a, word_b)).fetchall()
+        return [(sp, json.loads(reg or '{}'), json.loads(ana or '{}'), strat) for sp, reg, ana, strat in rows]
+
+
+def open_default_store():
+    """环境变量 NUANCE_SNAPSHOT 指定了快照路径时返回 SnapshotStore，否则返回 None (走 Postgres)"""
+    path = os.environ.get(SNAPSHOT_ENV)
+    return SnapshotStore(path) if path else None
+
+
+def main():
+    # python -m scripts.snapshot export [path]
+    if len(sys.argv) < 2: return
+    if sys.argv[1] == 'export':
+        export_snapshot(sys.argv[2] if len(sys.argv) > 2 else SNAPSHOT_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import re
+import sys
+import json
+import time
+import psycopg2
+from scripts.lexicon import load_lemma_map
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+(?:[-'][A-Za-z]+)*")
+TOP_SYNONYMS = 3
+TOP_GENRES = 3
+
+
+def summarize_register(reg_stats):
+    """每个来源取占比最高的几个语域 (完整分布留给单词详情页)"""
+    summary = {}
+    for source, stats in (reg_stats or {}).items():
+        total = sum(stats.values())
+        if not total: continue
+        top = sorted(stats.items(), key=lambda x: x[1], reverse=True)[:TOP_GENRES]
+        summary[source] = [{"genre": g, "pct": round(c / total * 100, 1)} for g, c in top]
+    return summary
+
+
+class TextAnnotator:
+    """
+    阅读助手的批量标注：整段文本 -> 分词 -> 原词与还原形一起去重 ->
+    两条 = ANY(...) 批量查询取回释义/策略/语域/近义词 -> 逐 token 标注。
+    无论文本多长，数据库往返次数固定。
+    """
+
+    def __init__(self, lemma_map=None):
+        if lemma_map is None:
+            conn = psycopg2.connect(**DB_CONFIG)
+            lemma_map = load_lemma_map(conn.cursor())
+            conn.close()
+        self.lemma_map = lemma_map
+
+    def tokenize(self, text):
+        """-> [(token, start, end, form, lemma)]；form 为小写原词，lemma 为词形表还原结果"""
+        tokens = []
+        for m in TOKEN_PATTERN.finditer(text):
+            w = m.group(0).lower()
+            tokens.append((m.group(0), m.start(), m.end(), w, self.lemma_map.get(w, w)))
+        return tokens
+
+    def _fetch_entries(self, lemmas, n_synonyms):
+        conn = psycopg2.connect(**DB_CONFIG)
+        cur = conn.cursor()
+
+        # 1. 基础信息 + 分析状态
+        cur.execute("""
+            SELECT w.id, w.spelling, w.processing_strategy, w.definition_cn, w.bnc_rank,
+                   p.register_stats, COALESCE(p.is_analyzed, FALSE)
+            FROM words w
+            LEFT JOIN word_nuance_profiles p ON w.id = p.word_id
+            WHERE w.spelling = ANY(%s)
+        """, (lemmas,))
+        rows = cur.fetchall()
+
+        # 2. 每个词的 Top-N 近义词 (word_synonyms 物化表)
+        ids = [r[0] for r in rows]
+        cur.execute("""
+            SELECT word_id, spelling, score FROM (
+                SELECT ws.word_id, s.spelling, ws.score,
+                       ROW_NUMBER() OVER (PARTITION BY ws.word_id ORDER BY ws.score DESC, s.bnc_rank) AS rn
+                FROM word_synonyms ws
+                JOIN words s ON s.id = ws.synonym_id
+                WHERE ws.word_id = ANY(%s)
+            ) t WHERE rn <= %s
+        """, (ids, n_synonyms))
+        syn_rows = cur.fetchall()
+        conn.close()
+        return rows, syn_rows
+
+    def annotate(self, text, n_synonyms=TOP_SYNONYMS):
+        """
+        返回 {"tokens": [...], "entries": {lemma: {...}}}
+        tokens 与原文一一对应 (含字符偏移)，entries 按词元去重，避免重复传输同一词的数据。
+        """
+        tokens = self.tokenize(text)
+        # 原词与还原形一起查询: 原词本身是词条时优先 (data / left / media 不被还原成 datum / leave / medium)
+        lemmas = sorted({t[3] for t in tokens} | {t[4] for t in tokens})
+        rows, syn_rows = self._fetch_entries(lemmas, n_synonyms) if lemmas else ([], [])
+
+        synonyms = {}
+        for wid, spelling, score in syn_rows:
+            synonyms.setdefault(wid, []).append({"spelling": spelling, "score": round(score, 3)})
+
+        entries = {}
+        for wid, spelling, strategy, def_cn, rank, reg_stats, analyzed in rows:
+            entries[spelling] = {
+                "id": wid,
+                "strategy": strategy,
+                "definition": def_cn,
+                "rank": rank,
+                "analyzed": bool(analyzed),
+                "register": summarize_register(reg_stats),
+                "synonyms": synonyms.get(wid, []),
+            }
+
+        annotated = []
+        for tok, s, e, form, lemma in tokens:
+            if form in entries: lemma = form
+            annotated.append({"text": tok, "start": s, "end": e, "lemma": lemma, "known": lemma in entries})
+
+        # 只返回被 token 实际引用的词条
+        used = {t["lemma"] for t in annotated}
+        return {
+            "tokens": annotated,
+            "entries": {k: v for k, v in entries.items() if k in used},
+        }
+
+
+def main():
+    # python -m scripts.text_annotator <file.txt>
+    if len(sys.argv) < 2: return
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        text = f.read()
+    annotator = TextAnnotator()
+    start = time.perf_counter()
+    result = annotator.annotate(text)
+    cost = (time.perf_counter() - start) * 1000
+    known = sum(1 for t in result['tokens'] if t['known'])
+    print(json.dumps(result, ensure_ascii=False, indent=1)[:2000])
+    print(f"\n📑 {len(result['tokens'])} tokens | {len(result['entries'])} 个已收录词元 | 覆盖 {known} tokens | {cost:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+增量维护 word_nuance_profiles：
+    build  [word ...]   全量计算指定单词 (不指定则补全所有缺少 count_state 的单词)
+    build --all         重算全部单词 (语料库整体替换导入后使用)
+    sync                只处理水位线之后新追加的句子，更新受影响的词条
+
+水位线 (nuance_meta.profile_sentence_watermark) 记录已计入计数的最大 corpus_sentences.id。
+build 只统计水位线以内的句子，sync 只统计水位线之后的句子，两者相加不会重复计数。
+导入进行中 (corpus_pipeline 持有共享 advisory lock) 时 build / sync 拒绝运行：
+多个写入进程并行提交，id 的可见顺序不递增，此时推进水位线会漏掉稍后提交的句子。
+注意：替换式导入 (corpus_pipeline 默认模式) 会让旧句子消失、新句子获得新 id，
+导入时会删除水位线并清空 count_state，此后 sync 拒绝运行，直到 build 重新计算。
+"""
+import sys
+import json
+from collections import defaultdict
+import psycopg2
+from scripts.analyzer import NuanceAnalyzer
+from scripts.corpus_pipeline import NOISE_GENRES, WATERMARK_KEY, IMPORT_LOCK_ID
+from scripts.usage_index import write_usage_items
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+SYNC_BATCH = 50000   # 增量同步时每批读取的新句子数
+ENGINE_STRATEGIES = ('PATTERN', 'LINEAR')
+
+
+def get_watermark(cur):
+    cur.execute("SELECT value FROM nuance_meta WHERE key = %s", (WATERMARK_KEY,))
+    row = cur.fetchone()
+    return int(row[0]) if row else None
+
+def set_watermark(cur, value):
+    cur.execute("""
+        INSERT INTO nuance_meta (key, value) VALUES (%s, %s)
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+    """, (WATERMARK_KEY, str(value)))
+
+def save_profile(cur, word_id, state, rendered):
+    cur.execute("""
+        INSERT INTO word_nuance_profiles (word_id, register_stats, analysis_data, count_state, is_analyzed, updated_at)
+        VALUES (%s, %s, %s, %s, TRUE, NOW())
+        ON CONFLICT (word_id) DO UPDATE SET
+            register_stats = EXCLUDED.register_stats,
+            analysis_data = EXCLUDED.analysis_data,
+            count_state = EXCLUDED.count_state,
+            is_analyzed = TRUE,
+            updated_at = NOW()
+    """, (word_id, json.dumps(rendered['register']), json.dumps(rendered['analysis']), json.dumps(state)))
+    # 同步展开到规范化明细表 (反向查询用)
+    write_usage_items(cur, word_id, state)
+
+def lock_out_imports(cur):
+    """排他地获取导入锁 (会话级，直到连接关闭)；有导入进行中返回 False"""
+    cur.execute("SELECT pg_try_advisory_lock(%s)", (IMPORT_LOCK_ID,))
+    return cur.fetchone()[0]
+
+def word_forms(analyzer):
+    """词元 -> 所有词形 (lemma_map 的反向表)"""
+    forms = defaultdict(set)
+    for variant, base in analyzer.lemma_map.items():
+        forms[base].add(variant)
+    return forms
+
+def match_forms(forms, lemma):
+    """句子包含其中任一词形即归属该词元 (build 与 sync 共用同一规则)"""
+    return forms[lemma] | {lemma}
+
+
+def build_profiles(words=None, rebuild_all=False):
+    analyzer = NuanceAnalyzer()
+    forms = word_forms(analyzer)
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    if not lock_out_imports(cur):
+        print("❌ 语料导入进行中，请等待导入完成后再运行 build。")
+        analyzer.close()
+        cur.close(); conn.close()
+        return
+
+    watermark = get_watermark(cur)
+    if watermark is None or rebuild_all:
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM corpus_sentences")
+        watermark = cur.fetchone()[0]
+        set_watermark(cur, watermark)
+        conn.commit()
+
+    if words:
+        cur.execute("SELECT id, spelling, processing_strategy FROM words WHERE spelling = ANY(%s)", (list(words),))
+    elif rebuild_all:
+        cur.execute("SELECT id, spelling, processing_strategy FROM words WHERE processing_strategy = ANY(%s)",
+                    (list(ENGINE_STRATEGIES),))
+    else:
+        cur.execute("""
+            SELECT w.id, w.spelling, w.processing_strategy FROM words w
+            LEFT JOIN word_nuance_profiles p ON w.id = p.word_id
+            WHERE w.processing_strategy = ANY(%s) AND p.count_state IS NULL
+        """, (list(ENGINE_STRATEGIES),))
+    targets = cur.fetchall()
+    print(f"🧮 [Build] 待计算 {len(targets)} 个单词 (句子水位线: {watermark})")
+
+    for i, (wid, spelling, strategy) in enumerate(targets):
+        lemma = spelling.lower()
+        cur.execute("""
+            SELECT sentence_text, words_array, source_corpus, original_genre, id
+            FROM corpus_sentences
+            WHERE words_array && %s::text[] AND id <= %s
+              AND original_genre NOT IN %s
+        """, (sorted(match_forms(forms, lemma)), watermark, NOISE_GENRES))
+        state = analyzer.collect_state(lemma, strategy, cur.fetchall())
+        save_profile(cur, wid, state, analyzer.render_state(state, strategy))
+        conn.commit()
+        print(f"\r⏳ 进度: {i+1}/{len(targets)} | {spelling.ljust(15)}", end="")
+
+    print(f"\n✅ 全量计算完成。")
+    analyzer.close()
+    cur.close(); conn.close()
+
+
+def sync_profiles():
+    analyzer = NuanceAnalyzer()
+    forms = word_forms(analyzer)
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    if not lock_out_imports(cur):
+        print("❌ 语料导入进行中，请等待导入完成后再运行 sync。")
+        analyzer.close()
+        cur.close(); conn.close()
+        return
+
+    watermark = get_watermark(cur)
+    if watermark is None:
+        # 首次运行或替换式导入之后: 计数状态与语料不对应，必须先全量计算
+        print("❌ 尚无水位线 (可能刚进行过替换式导入)，请先运行 build。")
+        analyzer.close()
+        cur.close(); conn.close()
+        return
+
+    # 只有已建立计数状态的单词才能增量更新
+    cur.execute("""
+        SELECT w.spelling FROM words w
+        JOIN word_nuance_profiles p ON w.id = p.word_id
+        WHERE p.count_state IS NOT NULL
+    """)
+    profiled = {r[0].lower() for r in cur.fetchall()}
+    # 词形 -> 词元: 与 build 的 words_array && 词形集合 规则一致
+    # (例如 left 既是 leave 的变形又是独立词条，两个词元都会收到该句)
+    owners = defaultdict(set)
+    for lemma in profiled:
+        for form in match_forms(forms, lemma):
+            owners[form].add(lemma)
+
+    total_sents, total_words = 0, 0
+    while True:
+        cur.execute("""
+            SELECT id, sentence_text, words_array, source_corpus, original_genre
+            FROM corpus_sentences
+            WHERE id > %s AND original_genre NOT IN %s
+            ORDER BY id LIMIT %s
+        """, (watermark, NOISE_GENRES, SYNC_BATCH))
+        rows = cur.fetchall()
+        if not rows: break
+
+        # 1. 按词元分组新句子 (只关心已有计数状态的词)
+        by_lemma = defaultdict(list)
+        for sid, text, words_arr, source, genre in rows:
+            lemmas = set().union(*(owners.get(w, ()) for w in words_arr))
+            for lemma in lemmas:
+                by_lemma[lemma].append((text, words_arr, source, genre, sid))
+
+        # 2. 合并到受影响词条
+        if by_lemma:
+            cur.execute("""
+                SELECT w.id, w.spelling, w.processing_strategy, p.count_state
+                FROM words w JOIN word_nuance_profiles p ON w.id = p.word_id
+                WHERE w.spelling = ANY(%s)
+            """, (list(by_lemma.keys()),))
+            for wid, spelling, strategy, base in cur.fetchall():
+                delta = analyzer.collect_state(spelling, strategy, by_lemma[spelling.lower()])
+                state = analyzer.merge_state(base, delta, strategy)
+                save_profile(cur, wid, state, analyzer.render_state(state, strategy))
+
+        # 3. 计数与水位线在同一事务中提交
+        watermark = rows[-1][0]
+        set_watermark(cur, watermark)
+        conn.commit()
+        total_sents += len(rows); total_words += len(by_lemma)
+        print(f"\r⏳ 已同步句子: {total_sents} | 更新词条: {total_words}", end="")
+
+    print(f"\n✅ 增量同步完成，水位线: {watermark}")
+    analyzer.close()
+    cur.close(); conn.close()
+
+
+def main():
+    if len(sys.argv) < 2: return
+    cmd = sys.argv[1]
+    if cmd == 'build':
+        args = sys.argv[2:]
+        build_profiles(words=[a for a in args if a != '--all'], rebuild_all='--all' in args)
+    elif cmd == 'sync':
+        sync_profiles()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import psycopg2
 import os
+from scripts.corpus_pipeline import ensure_source_partition
 
 # --- 配置 ---
 DB_CONFIG = {
@@ -34,6 +35,64 @@ def add_profile_table():
     
     -- 索引
     CREATE INDEX IF NOT EXISTS idx_profiles_word ON word_nuance_profiles(word_id);
+    
+    -- 🧮 可合并的原始计数状态 (完整计数器，用于增量更新)
+    -- analysis_data / register_stats 由它渲染得出
+    ALTER TABLE word_nuance_profiles ADD COLUMN IF NOT EXISTS count_state JSONB;
+    
+    -- 4. 引擎元数据 (如增量更新的句子水位线)
+    CREATE TABLE IF NOT EXISTS nuance_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    
+    -- 5. 构式/搭配明细表 (analysis_data 的规范化展开，支持反向查询)
+    -- 例: 哪些词在 Literature 中最常用 'V + that-clause'？ 'heavy' 修饰哪些名词？
+    CREATE TABLE IF NOT EXISTS word_usage_items (
+        word_id INTEGER REFERENCES words(id) ON DELETE CASCADE,
+        genre VARCHAR(50) NOT NULL,          -- 语域
+        item_type VARCHAR(10) NOT NULL,      -- 'pattern'(构式) / 'mod'(前置修饰) / 'obj'(后置搭配)
+        item TEXT NOT NULL,                  -- 'V + that-clause' / 'heavy rain'
+        collocate TEXT,                      -- 搭配词本身 (rain)，构式为 NULL
+        count INTEGER NOT NULL,
+        PRIMARY KEY (word_id, genre, item_type, item)
+    );
+    
+    CREATE INDEX IF NOT EXISTS idx_usage_item ON word_usage_items(item_type, item, genre, count DESC);
+    CREATE INDEX IF NOT EXISTS idx_usage_collocate ON word_usage_items(item_type, collocate, genre, count DESC);
+    
+    -- 6. profile 变更通知 (供 word_cache 的 LISTEN 失效)
+    CREATE OR REPLACE FUNCTION notify_profile_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            PERFORM pg_notify('profile_changed', '*');
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM pg_notify('profile_changed', OLD.word_id::text);
+        ELSE
+            PERFORM pg_notify('profile_changed', NEW.word_id::text);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    
+    DROP TRIGGER IF EXISTS trg_profile_change ON word_nuance_profiles;
+    CREATE TRIGGER trg_profile_change
+        AFTER INSERT OR UPDATE OR DELETE ON word_nuance_profiles
+        FOR EACH ROW EXECUTE FUNCTION notify_profile_change();
+    
+    DROP TRIGGER IF EXISTS trg_profile_truncate ON word_nuance_profiles;
+    CREATE TRIGGER trg_profile_truncate
+        AFTER TRUNCATE ON word_nuance_profiles
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_profile_change();
+    
+    -- 7. 近义词列表物化表 (由 SynonymEngine.materialize_synonyms 写入)
+    -- 批量标注时用 word_id = ANY(...) 一次取回所有词的近义词，不再逐词调用 WordNet
+    CREATE TABLE IF NOT EXISTS word_synonyms (
+        word_id INTEGER REFERENCES words(id) ON DELETE CASCADE,
+        synonym_id INTEGER REFERENCES words(id) ON DELETE CASCADE,
+        score REAL NOT NULL,
+        PRIMARY KEY (word_id, synonym_id)
+    );
     """
     
     try:
@@ -46,5 +105,64 @@ def add_profile_table():
     except Exception as e:
         print(f"❌ 错误: {e}")
 
+def partition_corpus_table():
+    """
+    把旧的单表 corpus_sentences 迁移为分区表 (按 source_corpus / 噪音语域分区)。
+    已经是分区表时直接跳过；全新安装由 database/schema.sql 直接建立分区结构。
+    """
+    print("🚧 [Schema Update] 检查 corpus_sentences 分区结构...")
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cur = conn.cursor()
+        cur.execute("SELECT relkind FROM pg_class WHERE relname = 'corpus_sentences'")
+        row = cur.fetchone()
+        if not row or row[0] == 'p':
+            print("✅ 无需迁移。")
+            cur.close(); conn.close()
+            return
+
+        # 1. 旧表改名 (索引/主键同时改名，避免与新表冲突)
+        cur.execute("""
+            ALTER TABLE corpus_sentences RENAME TO corpus_sentences_legacy;
+            ALTER INDEX IF EXISTS idx_corpus_words RENAME TO idx_corpus_words_legacy;
+            ALTER INDEX IF EXISTS idx_corpus_source_genre RENAME TO idx_corpus_source_genre_legacy;
+            ALTER INDEX IF EXISTS corpus_sentences_pkey RENAME TO corpus_sentences_legacy_pkey;
+        """)
+
+        # 2. 新分区父表，沿用原 id 序列
+        cur.execute("""
+            CREATE TABLE corpus_sentences (
+                id INTEGER NOT NULL DEFAULT nextval('corpus_sentences_id_seq'),
+                sentence_text TEXT NOT NULL,
+                words_array TEXT[] NOT NULL,
+                source_corpus VARCHAR(10) NOT NULL,
+                original_genre VARCHAR(50),
+                file_id VARCHAR(100),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) PARTITION BY LIST (source_corpus);
+            ALTER SEQUENCE corpus_sentences_id_seq OWNED BY corpus_sentences.id;
+            CREATE INDEX idx_corpus_words ON corpus_sentences USING GIN (words_array);
+            CREATE INDEX idx_corpus_id ON corpus_sentences(id);
+            CREATE INDEX idx_corpus_source_genre ON corpus_sentences(source_corpus, original_genre);
+        """)
+
+        # 3. 为每个来源建立分区并搬运数据
+        cur.execute("SELECT DISTINCT source_corpus FROM corpus_sentences_legacy WHERE source_corpus IS NOT NULL")
+        for (source,) in cur.fetchall():
+            ensure_source_partition(cur, source)
+            print(f"   📦 迁移 {source} ...")
+        cur.execute("""
+            INSERT INTO corpus_sentences (id, sentence_text, words_array, source_corpus, original_genre, file_id, created_at)
+            SELECT id, sentence_text, words_array, source_corpus, original_genre, file_id, created_at
+            FROM corpus_sentences_legacy WHERE source_corpus IS NOT NULL
+        """)
+        cur.execute("DROP TABLE corpus_sentences_legacy")
+        conn.commit()
+        print("✅ corpus_sentences 已迁移为分区表！")
+        cur.close(); conn.close()
+    except Exception as e:
+        print(f"❌ 错误: {e}")
+
 if __name__ == "__main__":
     add_profile_table()
+    partition_corpus_table()
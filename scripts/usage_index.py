@@ -0,0 +1,124 @@
+import sys
+import psycopg2
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+# 与渲染阈值一致: 跨语域合计只出现 1 次的构式/搭配不入表
+MIN_ITEM_COUNT = 2
+
+# 计数状态中的计数器 -> item_type
+ITEM_TYPES = {'patterns': 'pattern', 'modifiers': 'mod', 'objects': 'obj'}
+
+
+def iter_usage_items(state):
+    """把计数状态展开为 (genre, item_type, item, collocate, count) 行"""
+    genres = state.get('genres', {})
+    # 阈值按所有语域的合计判断 (不带语域过滤的反向查询会跨语域求和)
+    totals = {}
+    for g in genres.values():
+        for key in ITEM_TYPES:
+            for item, count in g.get(key, {}).items():
+                totals[key, item] = totals.get((key, item), 0) + count
+
+    for genre, g in genres.items():
+        for key, item_type in ITEM_TYPES.items():
+            for item, count in g.get(key, {}).items():
+                if totals[key, item] < MIN_ITEM_COUNT: continue
+                collocate = None
+                if item_type == 'mod': collocate = item.split(' ')[0]     # heavy rain -> heavy
+                elif item_type == 'obj': collocate = item.split(' ')[-1]  # rain heavily -> heavily
+                yield (genre, item_type, item, collocate, count)
+
+
+def write_usage_items(cur, word_id, state):
+    """用最新计数状态替换该词的明细行 (与 profile 写入处于同一事务)"""
+    cur.execute("DELETE FROM word_usage_items WHERE word_id = %s", (word_id,))
+    rows = [(word_id,) + r for r in iter_usage_items(state)]
+    for i in range(0, len(rows), 2000):
+        args = ','.join(cur.mogrify("(%s,%s,%s,%s,%s,%s)", x).decode('utf-8') for x in rows[i:i+2000])
+        cur.execute(f"INSERT INTO word_usage_items (word_id, genre, item_type, item, collocate, count) VALUES {args}")
+
+
+# ==========================================================
+# 🔍 反向查询 (均走 B-tree 索引)
+# ==========================================================
+def words_by_pattern(template, genre=None, limit=20):
+    """哪些词最常使用某个构式，例如 'V + that-clause'"""
+    return _words_by('item', 'pattern', template, genre, limit)
+
+def words_by_collocate(collocate, item_type='mod', genre=None, limit=20):
+    """哪些词与某个搭配词共现，例如 collocate='heavy', item_type='mod' -> rain / traffic (heavy 修饰的词)"""
+    return _words_by('collocate', item_type, collocate, genre, limit)
+
+def _words_by(column, item_type, value, genre, limit):
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    sql = f"""
+        SELECT w.spelling, SUM(u.count) AS total
+        FROM word_usage_items u
+        JOIN words w ON w.id = u.word_id
+        WHERE u.item_type = %s AND u.{column} = %s
+    """
+    params = [item_type, value]
+    if genre:
+        sql += " AND u.genre = %s"
+        params.append(genre)
+    sql += " GROUP BY w.spelling ORDER BY total DESC LIMIT %s"
+    params.append(limit)
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    conn.close()
+    return [{"spelling": r[0], "count": int(r[1])} for r in rows]
+
+def items_of_word(word, item_type, genre=None, limit=20):
+    """正向查询: 某词的构式/搭配，例如 'heavy' 的后置名词"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    sql = """
+        SELECT u.item, SUM(u.count) AS total
+        FROM word_usage_items u
+        JOIN words w ON w.id = u.word_id
+        WHERE w.spelling = %s AND u.item_type = %s
+    """
+    params = [word, item_type]
+    if genre:
+        sql += " AND u.genre = %s"
+        params.append(genre)
+    sql += " GROUP BY u.item ORDER BY total DESC LIMIT %s"
+    params.append(limit)
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    conn.close()
+    return [{"item": r[0], "count": int(r[1])} for r in rows]
+
+
+def main():
+    # python -m scripts.usage_index pattern "V + that-clause" [genre]
+    # python -m scripts.usage_index collocate heavy [mod|obj] [genre]
+    # python -m scripts.usage_index word heavy [pattern|mod|obj] [genre]
+    if len(sys.argv) < 3: return
+    cmd, value = sys.argv[1], sys.argv[2]
+    if cmd == 'pattern':
+        genre = sys.argv[3] if len(sys.argv) > 3 else None
+        rows = words_by_pattern(value, genre)
+    elif cmd == 'collocate':
+        item_type = sys.argv[3] if len(sys.argv) > 3 else 'mod'
+        genre = sys.argv[4] if len(sys.argv) > 4 else None
+        rows = words_by_collocate(value, item_type, genre)
+    elif cmd == 'word':
+        item_type = sys.argv[3] if len(sys.argv) > 3 else 'obj'
+        genre = sys.argv[4] if len(sys.argv) > 4 else None
+        rows = items_of_word(value, item_type, genre)
+    else:
+        return
+
+    print(f"\n🔍 {cmd}: {value}")
+    for r in rows:
+        label = r.get('spelling') or r.get('item')
+        print(f"   • {label.ljust(25)} ({r['count']})")
+
+if __name__ == "__main__":
+    main()
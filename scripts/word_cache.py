@@ -0,0 +1,278 @@
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import psycopg2
+from scripts.synonym_service import SynonymEngine
+
+try:
+    import brotli  # 可选依赖: 未安装时只提供 gzip
+except ImportError:
+    brotli = None
+
+DB_CONFIG = {
+    "dbname": "nuance_engine_db", "user": "postgres", "password": "5432",
+    "host": "localhost", "options": "-c client_encoding=utf8"
+}
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(BASE_DIR, 'data', 'word_cache')
+
+NOTIFY_CHANNEL = 'profile_changed'  # 由 word_nuance_profiles 上的触发器发出 (见 update_schema.py)
+DEFAULT_MAXSIZE = 5000              # 覆盖高频 IELTS 词即可
+DEFAULT_TTL = 3600                  # 秒; 兜底其他词的近义词列表变化 (不会触发本词的通知)
+LISTEN_RETRY = 30                   # 秒; 监听连接不可用时的重连间隔
+
+
+def build_word_payload(cur, engine, word):
+    """
+    组装单词页面所需的完整数据: 基础信息 + 语域统计 + 分析结果 + 近义词
+    返回 (word_id, updated_at, payload)，未收录返回 None
+    """
+    cur.execute("""
+        SELECT w.id, w.spelling, w.phonetic, w.definition_cn, w.bnc_rank, w.frq_rank, w.processing_strategy,
+               p.register_stats, p.analysis_data, p.updated_at
+        FROM words w
+        LEFT JOIN word_nuance_profiles p ON w.id = p.word_id
+        WHERE w.spelling = %s
+    """, (word,))
+    row = cur.fetchone()
+    if not row: return None
+
+    wid, spelling, phonetic, def_cn, bnc, frq, strategy, reg_stats, analysis, updated_at = row
+    payload = {
+        "id": wid,
+        "spelling": spelling,
+        "phonetic": phonetic,
+        "definition_cn": def_cn,
+        "bnc_rank": bnc,
+        "frq_rank": frq,
+        "strategy": strategy,
+        "register": reg_stats or {},
+        "analysis": analysis or {},
+        "synonyms": engine.get_synonyms_scored(spelling),
+        "updated_at": updated_at.isoformat() if updated_at else None,
+    }
+    return wid, updated_at, payload
+
+
+def make_etag(body):
+    # 由响应体内容派生: 近义词列表等随其他词重算而变化的部分也会反映到 ETag 上
+    return '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+
+class CacheEntry:
+    """预压缩好的响应体，命中时直接返回，不做任何序列化/压缩"""
+    __slots__ = ('word_id', 'etag', 'body', 'gzip', 'br', 'created')
+
+    def __init__(self, word_id, payload):
+        self.word_id = word_id
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = make_etag(self.body)
+        self.gzip = gzip.compress(self.body, compresslevel=9)
+        self.br = brotli.compress(self.body) if brotli else None
+        self.created = time.monotonic()
+
+
+class WordCache:
+    """
+    单词页面响应缓存 (内存 LRU)。
+    - 命中时不访问 Postgres / NLTK
+    - ETag 由响应体哈希派生，支持 If-None-Match -> 304
+    - 通过 LISTEN profile_changed 接收失效通知，profile 行变化时立即淘汰
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # spelling -> CacheEntry
+        self._by_id = {}                # word_id -> spelling
+        self._lock = threading.Lock()
+        self._engine = SynonymEngine()
+        # 失效序号: 回源构建期间若该词 (或整个缓存) 被失效，构建结果不再写入缓存
+        self._seq = 0
+        self._invalidated_at = {}       # word_id -> 最近一次失效的序号
+        self._cleared_at = 0
+        self._listen_conn = None
+        self._listen_retry_at = 0
+        self._start_listener()
+
+    # --- 失效通知 ---
+    def _start_listener(self):
+        try:
+            conn = psycopg2.connect(**DB_CONFIG)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL};")
+            self._listen_conn = conn
+            return True
+        except Exception as e:
+            self._listen_retry_at = time.monotonic() + LISTEN_RETRY
+            print(f"⚠️ 缓存失效监听未启动 ({LISTEN_RETRY}s 后重试，期间仅依赖 TTL): {e}")
+            return False
+
+    def _reconnect_locked(self):
+        """重新 LISTEN；断线期间的通知已丢失，连上后清空缓存"""
+        if time.monotonic() < self._listen_retry_at: return False
+        if not self._start_listener(): return False
+        self._clear_locked()
+        return True
+
+    def _drain_notifications(self):
+        # poll() 只读取 socket 上已到达的消息，不产生查询往返
+        # 服务端在线程池中处理请求，整个读取过程持有锁，避免多个线程争抢同一连接
+        with self._lock:
+            if not self._listen_conn and not self._reconnect_locked(): return
+            try:
+                self._listen_conn.poll()
+            except Exception:
+                try: self._listen_conn.close()
+                except Exception: pass
+                self._listen_conn = None
+                self._listen_retry_at = 0
+                self._reconnect_locked()
+                return
+            while self._listen_conn.notifies:
+                note = self._listen_conn.notifies.pop(0)
+                if note.payload == '*':
+                    self._clear_locked()
+                elif note.payload.isdigit():
+                    self._invalidate_locked(int(note.payload))
+
+    def _invalidate_locked(self, word_id):
+        self._seq += 1
+        self._invalidated_at[word_id] = self._seq
+        spelling = self._by_id.pop(word_id, None)
+        if spelling: self._entries.pop(spelling, None)
+
+    def _clear_locked(self):
+        self._seq += 1
+        self._cleared_at = self._seq
+        self._entries.clear()
+        self._by_id.clear()
+
+    def invalidate_id(self, word_id):
+        with self._lock:
+            self._invalidate_locked(word_id)
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    # --- 读写 ---
+    def get(self, word):
+        self._drain_notifications()
+        with self._lock:
+            entry = self._entries.get(word)
+            if entry and time.monotonic() - entry.created > self.ttl:
+                self._entries.pop(word)
+                self._by_id.pop(entry.word_id, None)
+                entry = None
+            if entry:
+                self._entries.move_to_end(word)
+                return entry
+            start_seq = self._seq
+
+        # 未命中: 回源构建 (锁外进行，避免阻塞其他请求)
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            built = build_word_payload(conn.cursor(), self._engine, word)
+        finally:
+            conn.close()
+        if not built: return None
+
+        wid, updated_at, payload = built
+        entry = CacheEntry(wid, payload)
+        with self._lock:
+            # 构建期间收到过失效通知: 读到的可能是旧版本，本次结果只返回不缓存
+            if self._cleared_at > start_seq or self._invalidated_at.get(wid, 0) > start_seq:
+                return entry
+            self._entries[word] = entry
+            self._by_id[wid] = word
+            while len(self._entries) > self.maxsize:
+                _, old = self._entries.popitem(last=False)
+                self._by_id.pop(old.word_id, None)
+        return entry
+
+    def lookup(self, word, if_none_match=None, accept_encoding=''):
+        """
+        HTTP 语义的查询入口，返回 (status, headers, body)
+        """
+        entry = self.get(word)
+        if not entry:
+            return 404, {}, b''
+
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": "no-cache",   # 客户端每次带 If-None-Match 重新验证
+            "Vary": "Accept-Encoding",
+            "Content-Type": "application/json; charset=utf-8",
+        }
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            if '*' in tags or entry.etag in tags or f"W/{entry.etag}" in tags:
+                return 304, headers, b''
+
+        accept = accept_encoding.lower()
+        if entry.br is not None and 'br' in accept:
+            headers["Content-Encoding"] = "br"
+            return 200, headers, entry.br
+        if 'gzip' in accept:
+            headers["Content-Encoding"] = "gzip"
+            return 200, headers, entry.gzip
+        return 200, headers, entry.body
+
+
+def export_static(words, out_dir=STATIC_DIR):
+    """
+    预渲染热门词为静态文件 (word.json / .json.gz / .json.br / .etag)，
+    可直接交给 nginx gzip_static / CDN 提供服务
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    engine = SynonymEngine()
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    count = 0
+    for word in words:
+        built = build_word_payload(cur, engine, word)
+        if not built: continue
+        wid, updated_at, payload = built
+        entry = CacheEntry(wid, payload)
+        base = os.path.join(out_dir, f"{word}.json")
+        with open(base, 'wb') as f: f.write(entry.body)
+        with open(base + '.gz', 'wb') as f: f.write(entry.gzip)
+        if entry.br is not None:
+            with open(base + '.br', 'wb') as f: f.write(entry.br)
+        with open(base + '.etag', 'w') as f: f.write(entry.etag)
+        count += 1
+        print(f"\r⏳ 已导出: {count}", end="")
+    conn.close()
+    print(f"\n✅ 静态缓存已写入 {out_dir}")
+
+
+def hot_words(limit):
+    """IELTS 词中按 BNC 排名最靠前的一批"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT spelling FROM words
+        WHERE tags LIKE '%%ielts%%' AND bnc_rank > 0
+        ORDER BY bnc_rank LIMIT %s
+    """, (limit,))
+    words = [r[0] for r in cur.fetchall()]
+    conn.close()
+    return words
+
+
+def main():
+    # python -m scripts.word_cache export [N]
+    if len(sys.argv) < 2: return
+    if sys.argv[1] == 'export':
+        limit = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+        export_static(hot_words(limit))
+
+if __name__ == "__main__":
+    main()